@@ -0,0 +1,37 @@
+"""add job queue columns to reports
+
+Revision ID: a41c7d2e9f03
+Revises: 3b9e4f1c7a2d
+Create Date: 2026-10-17 10:03:18.774512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c7d2e9f03'
+down_revision: Union[str, None] = '3b9e4f1c7a2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lease/heartbeat/retry columns so reports can be claimed by the standalone worker
+    op.add_column('reports', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('reports', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+    op.add_column('reports', sa.Column('locked_by', sa.String(length=100), nullable=True))
+    op.add_column('reports', sa.Column('locked_until', sa.DateTime(), nullable=True))
+    op.add_column('reports', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_reports_status_next_attempt_at', 'reports', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reports_status_next_attempt_at', table_name='reports')
+    op.drop_column('reports', 'heartbeat_at')
+    op.drop_column('reports', 'locked_until')
+    op.drop_column('reports', 'locked_by')
+    op.drop_column('reports', 'next_attempt_at')
+    op.drop_column('reports', 'attempts')
@@ -0,0 +1,94 @@
+"""add answer_revisions table
+
+Revision ID: a6c4e2f8b913
+Revises: f3b8d1c6a927
+Create Date: 2026-10-17 16:20:11.503862
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c4e2f8b913'
+down_revision: Union[str, None] = 'f3b8d1c6a927'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+answers = sa.table(
+    'answers',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('answer', sa.JSON),
+    sa.column('created_at', sa.DateTime),
+    sa.column('updated_at', sa.DateTime),
+)
+answer_revisions = sa.table(
+    'answer_revisions',
+    sa.column('answer_id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('answer', sa.JSON),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'answer_revisions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('answer_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('answer', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['answer_id'], ['answers.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_answer_revisions_id'), 'answer_revisions', ['id'], unique=False)
+    op.create_index('ix_answer_revisions_answer_created', 'answer_revisions', ['answer_id', 'created_at'], unique=False)
+    op.create_index('ix_answer_revisions_created', 'answer_revisions', ['created_at'], unique=False)
+
+    # Move the submissions accumulated in answers.answer (a JSON list) into
+    # revisions and keep only the latest value on the answers row
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(answers.c.id, answers.c.user_id, answers.c.answer, answers.c.created_at, answers.c.updated_at)
+            .where(answers.c.id > last_id)
+            .order_by(answers.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        revisions = []
+        for row in rows:
+            values = row.answer if isinstance(row.answer, list) else [row.answer]
+            for position, value in enumerate(values):
+                is_latest = position == len(values) - 1
+                revisions.append({
+                    "answer_id": row.id,
+                    "user_id": row.user_id,
+                    "answer": value,
+                    # Only the first and the latest submission times are known
+                    "created_at": (row.updated_at if is_latest else row.created_at) or row.created_at,
+                })
+            if isinstance(row.answer, list):
+                bind.execute(
+                    answers.update().where(answers.c.id == row.id).values(answer=values[-1] if values else None)
+                )
+        if revisions:
+            bind.execute(answer_revisions.insert(), revisions)
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    # answers.answer keeps the latest value; the history is dropped with the table
+    op.drop_index('ix_answer_revisions_created', table_name='answer_revisions')
+    op.drop_index('ix_answer_revisions_answer_created', table_name='answer_revisions')
+    op.drop_index(op.f('ix_answer_revisions_id'), table_name='answer_revisions')
+    op.drop_table('answer_revisions')
@@ -0,0 +1,81 @@
+"""compress report content
+
+Revision ID: b8e1f5a3c702
+Revises: a6c4e2f8b913
+Create Date: 2026-10-17 18:05:42.317094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+from app.compressed_json import encode_json, decode_json, REPORT_DICTIONARY_V1
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e1f5a3c702'
+down_revision: Union[str, None] = 'a6c4e2f8b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 200
+
+BLOB = sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql')
+
+# Raw column views; values are converted here, not by the model's CompressedJSON type
+reports_upgrade = sa.table(
+    'reports',
+    sa.column('id', sa.Integer),
+    sa.column('content', sa.Text),
+    sa.column('content_compressed', sa.LargeBinary),
+)
+reports_downgrade = sa.table(
+    'reports',
+    sa.column('id', sa.Integer),
+    sa.column('content', sa.JSON),
+    sa.column('content_compressed', sa.LargeBinary),
+)
+
+
+def _copy_content(reports, source: str, target: str, convert) -> None:
+    """Copy every non-null reports.<source> into <target>, converted, in id batches"""
+    bind = op.get_bind()
+    source_column, target_column = reports.c[source], reports.c[target]
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(reports.c.id, source_column)
+            .where(reports.c.id > last_id, source_column.isnot(None))
+            .order_by(reports.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            bind.execute(
+                reports.update().where(reports.c.id == row.id).values({target_column: convert(row[1])})
+            )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    # reports.content becomes a compressed blob (app/compressed_json.py); build it
+    # next to the JSON column, then swap the two
+    op.add_column('reports', sa.Column('content_compressed', BLOB, nullable=True))
+    _copy_content(
+        reports_upgrade, 'content', 'content_compressed',
+        lambda text: encode_json(decode_json(text), REPORT_DICTIONARY_V1)
+    )
+    op.drop_column('reports', 'content')
+    op.alter_column('reports', 'content_compressed', new_column_name='content',
+                    existing_type=BLOB, existing_nullable=True)
+
+
+def downgrade() -> None:
+    op.alter_column('reports', 'content', new_column_name='content_compressed',
+                    existing_type=BLOB, existing_nullable=True)
+    op.add_column('reports', sa.Column('content', sa.JSON(), nullable=True))
+    _copy_content(reports_downgrade, 'content_compressed', 'content', decode_json)
+    op.drop_column('reports', 'content_compressed')
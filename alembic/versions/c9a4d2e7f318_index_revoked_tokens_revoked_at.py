@@ -0,0 +1,27 @@
+"""index revoked_tokens.revoked_at
+
+Revision ID: c9a4d2e7f318
+Revises: b8e1f5a3c702
+Create Date: 2026-10-17 19:12:05.640213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9a4d2e7f318'
+down_revision: Union[str, None] = 'b8e1f5a3c702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The token revocation Bloom filter syncs rows revoked since its last refresh
+    op.create_index(op.f('ix_revoked_tokens_revoked_at'), 'revoked_tokens', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_revoked_tokens_revoked_at'), table_name='revoked_tokens')
@@ -0,0 +1,27 @@
+"""add report regeneration mode
+
+Revision ID: d3f7b1c6e024
+Revises: c9a4d2e7f318
+Create Date: 2026-10-17 20:41:18.502367
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f7b1c6e024'
+down_revision: Union[str, None] = 'c9a4d2e7f318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Carries the requested regeneration mode ("incremental" / "full") to the worker
+    op.add_column('reports', sa.Column('regeneration_mode', sa.String(length=20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('reports', 'regeneration_mode')
@@ -0,0 +1,42 @@
+"""add unique key on answers (question_id, ideaBoard_id, user_id)
+
+Revision ID: d9f2b6a4c831
+Revises: c5d81a3e6b47
+Create Date: 2026-10-17 13:26:05.114902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f2b6a4c831'
+down_revision: Union[str, None] = 'c5d81a3e6b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep only the newest row of any duplicated (question, idea, user) answer
+    op.execute("""
+        DELETE FROM answers
+        WHERE question_id IS NOT NULL
+          AND ideaBoard_id IS NOT NULL
+          AND user_id IS NOT NULL
+          AND id NOT IN (
+              SELECT keep_id FROM (
+                  SELECT MAX(id) AS keep_id
+                  FROM answers
+                  GROUP BY question_id, ideaBoard_id, user_id
+              ) AS latest
+          )
+    """)
+    op.create_unique_constraint(
+        'uq_answers_question_idea_user', 'answers', ['question_id', 'ideaBoard_id', 'user_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_answers_question_idea_user', 'answers', type_='unique')
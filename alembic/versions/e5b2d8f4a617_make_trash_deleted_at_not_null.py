@@ -0,0 +1,32 @@
+"""make trash.deleted_at not null
+
+Revision ID: e5b2d8f4a617
+Revises: d3f7b1c6e024
+Create Date: 2026-10-17 21:06:53.184920
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2d8f4a617'
+down_revision: Union[str, None] = 'd3f7b1c6e024'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+trash = sa.table('trash', sa.column('deleted_at', sa.DateTime))
+
+
+def upgrade() -> None:
+    # The trash list pages on (deleted_at, id), which skips rows with a NULL
+    # deleted_at; date any such rows now, so they are listed and later cleaned up
+    op.execute(trash.update().where(trash.c.deleted_at.is_(None)).values(deleted_at=datetime.utcnow()))
+    op.alter_column('trash', 'deleted_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    op.alter_column('trash', 'deleted_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,51 @@
+"""add composite indexes for hot queries
+
+Revision ID: e7a3c9d5f210
+Revises: d9f2b6a4c831
+Create Date: 2026-10-17 14:05:52.671390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c9d5f210'
+down_revision: Union[str, None] = 'd9f2b6a4c831'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # answers(question_id, ideaBoard_id, user_id) is already covered by uq_answers_question_idea_user
+    op.create_index('ix_answers_idea_user', 'answers', ['ideaBoard_id', 'user_id'], unique=False)
+    op.create_index('ix_reports_idea_status', 'reports', ['idea_id', 'status'], unique=False)
+    op.create_index('ix_trash_user_deleted_at', 'trash', ['user_id', 'deleted_at'], unique=False)
+    op.create_index(op.f('ix_customer_personas_user_id'), 'customer_personas', ['user_id'], unique=False)
+
+    # A persona can only be linked to an idea once; drop duplicate links (keeping the first) before enforcing it
+    op.execute("""
+        DELETE FROM idea_persona_links
+        WHERE idea_id IS NOT NULL
+          AND persona_id IS NOT NULL
+          AND id NOT IN (
+              SELECT keep_id FROM (
+                  SELECT MIN(id) AS keep_id
+                  FROM idea_persona_links
+                  GROUP BY idea_id, persona_id
+              ) AS first_links
+          )
+    """)
+    op.create_unique_constraint(
+        'uq_idea_persona_links_idea_persona', 'idea_persona_links', ['idea_id', 'persona_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_idea_persona_links_idea_persona', 'idea_persona_links', type_='unique')
+    op.drop_index(op.f('ix_customer_personas_user_id'), table_name='customer_personas')
+    op.drop_index('ix_trash_user_deleted_at', table_name='trash')
+    op.drop_index('ix_reports_idea_status', table_name='reports')
+    op.drop_index('ix_answers_idea_user', table_name='answers')
@@ -0,0 +1,27 @@
+"""add section fingerprints to reports
+
+Revision ID: f3b8d1c6a927
+Revises: e7a3c9d5f210
+Create Date: 2026-10-17 15:12:40.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d1c6a927'
+down_revision: Union[str, None] = 'e7a3c9d5f210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-section input fingerprints for incremental report regeneration
+    op.add_column('reports', sa.Column('section_fingerprints', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('reports', 'section_fingerprints')
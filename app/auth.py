@@ -26,6 +26,7 @@ from sqlalchemy.orm import Session
 from .database import get_db
 from .models import User
 from app.blacklist import is_token_blacklisted
+from app.user_cache import get_user_by_email
 import secrets
 
 # Token expiration times
@@ -85,8 +86,8 @@ def get_current_user(token: HTTPAuthorizationCredentials = Depends(HTTPBearer())
     except JWTError:
         raise credentials_exception
 
-    # Query user from database
-    user = db.query(User).filter(User.email == email).first()
+    # Resolve the user (served from the short-lived user cache when possible)
+    user = get_user_by_email(db, email)
     if user is None:
         raise credentials_exception
     return user
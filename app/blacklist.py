@@ -1,8 +1,229 @@
 # app/blacklist.py
-blacklisted_tokens = set()
+"""
+Revoked (logged-out) JWTs.
+
+Tokens are stored by SHA-256 hash together with their own expiry, so entries
+can be purged once the token could no longer be used anyway. The backend is
+chosen with TOKEN_REVOCATION_BACKEND:
+
+- "database" (default): the `revoked_tokens` table, shared by every worker
+  and kept across restarts.
+- "memory": a per-process dict; only suitable for a single worker.
+
+The database backend keeps a local Bloom filter of revoked hashes in front
+of the table (TOKEN_REVOCATION_BLOOM_ENABLED, on by default), so tokens that
+were never revoked (almost all of them) are answered without a query. The
+filter is refreshed from the table every TOKEN_REVOCATION_SYNC_SECONDS,
+which is also how long a logout on another worker can take to be seen here.
+Turning the filter off costs a query per authenticated request.
+
+Refreshes fetch the rows revoked since the previous refresh by `revoked_at`,
+re-reading the last TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS: a revocation
+committed after a later one (or stamped by a worker with a slightly
+different clock) is still picked up. Ids are not used for this, as MySQL
+assigns them before commit.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import or_
+
+from app.database import SessionLocal
+from app.models import RevokedToken
+
+TOKEN_REVOCATION_BACKEND = os.getenv("TOKEN_REVOCATION_BACKEND", "database").lower()
+TOKEN_REVOCATION_BLOOM_ENABLED = os.getenv("TOKEN_REVOCATION_BLOOM_ENABLED", "true").lower() == "true"
+TOKEN_REVOCATION_BLOOM_CAPACITY = int(os.getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", 100000))
+TOKEN_REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("TOKEN_REVOCATION_BLOOM_ERROR_RATE", 0.001))
+TOKEN_REVOCATION_SYNC_SECONDS = float(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", 5))
+TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS = float(os.getenv("TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS", 60))
+TOKEN_REVOCATION_PURGE_SECONDS = float(os.getenv("TOKEN_REVOCATION_PURGE_SECONDS", 3600))
+# Used when a token carries no readable `exp` claim (matches the refresh token lifetime)
+TOKEN_REVOCATION_DEFAULT_TTL_SECONDS = int(os.getenv("TOKEN_REVOCATION_DEFAULT_TTL_SECONDS", 7 * 24 * 3600))
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def token_expiry(token: str) -> datetime:
+    """The token's `exp` claim as a naive UTC datetime"""
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+        if exp is not None:
+            return datetime.utcfromtimestamp(int(exp))
+    except (JWTError, ValueError, TypeError):
+        pass
+    return datetime.utcnow() + timedelta(seconds=TOKEN_REVOCATION_DEFAULT_TTL_SECONDS)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over hex SHA-256 digests"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, token_hash: str) -> Iterable[int]:
+        # Double hashing on two 64-bit halves of the (already uniform) digest
+        h1 = int(token_hash[:16], 16)
+        h2 = int(token_hash[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, token_hash: str) -> None:
+        if token_hash in self:
+            return  # already present (e.g. re-read by an overlapping sync); keep `count` honest
+        for pos in self._positions(token_hash):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, token_hash: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(token_hash))
+
+
+class MemoryRevocationBackend:
+    """Per-process store; revocations are not shared between workers"""
+
+    def __init__(self):
+        self._tokens: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
+
+    def revoke(self, token_hash: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._tokens[token_hash] = expires_at
+        if time.monotonic() - self._last_purge > TOKEN_REVOCATION_PURGE_SECONDS:
+            self.purge_expired()
+
+    def is_revoked(self, token_hash: str) -> bool:
+        expires_at = self._tokens.get(token_hash)
+        return expires_at is not None and expires_at > datetime.utcnow()
+
+    def purge_expired(self) -> int:
+        now = datetime.utcnow()
+        with self._lock:
+            expired = [key for key, expires_at in self._tokens.items() if expires_at <= now]
+            for key in expired:
+                del self._tokens[key]
+            self._last_purge = time.monotonic()
+        return len(expired)
+
+
+class DatabaseRevocationBackend:
+    """`revoked_tokens` table, optionally fronted by a local Bloom filter"""
+
+    def __init__(self, use_bloom: bool = True):
+        self.use_bloom = use_bloom
+        self._bloom: Optional[BloomFilter] = None
+        self._synced_until: Optional[datetime] = None
+        self._last_sync = 0.0
+        self._last_purge = time.monotonic()
+        self._lock = threading.Lock()
+
+    def revoke(self, token_hash: str, expires_at: datetime) -> None:
+        db = SessionLocal()
+        try:
+            if not db.query(RevokedToken.id).filter(RevokedToken.token_hash == token_hash).first():
+                db.add(RevokedToken(token_hash=token_hash, expires_at=expires_at))
+                db.commit()
+        except Exception as e:
+            # A concurrent logout with the same token already inserted the row
+            db.rollback()
+            print(f"[Token Revocation] Could not store revoked token: {e}")
+        finally:
+            db.close()
+        if self._bloom is not None:
+            with self._lock:
+                self._bloom.add(token_hash)
+        if time.monotonic() - self._last_purge > TOKEN_REVOCATION_PURGE_SECONDS:
+            self.purge_expired()
+
+    def is_revoked(self, token_hash: str) -> bool:
+        if self.use_bloom and token_hash not in self._sync_bloom():
+            return False
+        db = SessionLocal()
+        try:
+            return db.query(RevokedToken.id).filter(
+                RevokedToken.token_hash == token_hash,
+                RevokedToken.expires_at > datetime.utcnow()
+            ).first() is not None
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        db = SessionLocal()
+        try:
+            deleted = db.query(RevokedToken).filter(
+                RevokedToken.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"[Token Revocation] Purge failed: {e}")
+            deleted = 0
+        finally:
+            db.close()
+        self._last_purge = time.monotonic()
+        if deleted:
+            print(f"[Token Revocation] 🧹 Purged {deleted} expired revoked token(s)")
+            with self._lock:
+                # Rebuild on next check so purged hashes stop matching
+                self._bloom = None
+        return deleted
+
+    def _sync_bloom(self) -> BloomFilter:
+        bloom = self._bloom
+        if bloom is not None and time.monotonic() - self._last_sync < TOKEN_REVOCATION_SYNC_SECONDS:
+            return bloom
+        with self._lock:
+            if self._bloom is not None and time.monotonic() - self._last_sync < TOKEN_REVOCATION_SYNC_SECONDS:
+                return self._bloom
+            rebuild = self._bloom is None or self._bloom.count >= self._bloom.capacity
+            started = datetime.utcnow()
+            db = SessionLocal()
+            try:
+                query = db.query(RevokedToken.token_hash).filter(RevokedToken.expires_at > started)
+                if not rebuild and self._synced_until is not None:
+                    # Rows revoked (by any worker) since the last sync, plus an overlap for late commits
+                    since = self._synced_until - timedelta(seconds=TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS)
+                    query = query.filter(or_(RevokedToken.revoked_at >= since, RevokedToken.revoked_at == None))  # noqa: E711
+                rows = query.all()
+            finally:
+                db.close()
+
+            if rebuild:
+                capacity = TOKEN_REVOCATION_BLOOM_CAPACITY
+                while capacity <= len(rows):
+                    capacity *= 2
+                self._bloom = BloomFilter(capacity, TOKEN_REVOCATION_BLOOM_ERROR_RATE)
+            for (token_hash,) in rows:
+                self._bloom.add(token_hash)
+            self._synced_until = started
+            self._last_sync = time.monotonic()
+            return self._bloom
+
+
+def _create_backend():
+    if TOKEN_REVOCATION_BACKEND == "memory":
+        return MemoryRevocationBackend()
+    return DatabaseRevocationBackend(use_bloom=TOKEN_REVOCATION_BLOOM_ENABLED)
+
+
+revocation_backend = _create_backend()
+
 
 def is_token_blacklisted(token: str) -> bool:
-    return token in blacklisted_tokens
+    return revocation_backend.is_revoked(hash_token(token))
 
 def blacklist_token(token: str):
-    blacklisted_tokens.add(token)
+    revocation_backend.revoke(hash_token(token), token_expiry(token))
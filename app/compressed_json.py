@@ -0,0 +1,187 @@
+# app/compressed_json.py
+"""
+JSON column stored compressed.
+
+`CompressedJSON` is a drop-in replacement for `JSON` on large documents
+(report bodies): values are serialized, compressed and stored in a binary
+column (LONGBLOB on MySQL), and decoded transparently when loaded.
+
+Every stored value starts with a 2-byte header: the codec (b"z" zlib,
+b"s" zstd, b"j" uncompressed JSON) and the id of the preset dictionary it
+was compressed with (0 for none). New values are written with
+JSON_COMPRESSION ("zlib" by default; "zstd" needs the optional `zstandard`
+package and falls back to zlib without it; "none" stores plain JSON). Any
+stored format can be read, including plain JSON text written before the
+column was compressed.
+
+A preset dictionary primes the compressor with the keys, section titles and
+phrases every report repeats, which is where most of the saving on a
+single small document comes from. Rows reference a dictionary by id, so a
+released dictionary must never change; add a new id instead.
+"""
+import json
+import os
+import zlib
+from typing import Any, Dict, Optional
+
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+JSON_COMPRESSION = os.getenv("JSON_COMPRESSION", "zlib").lower()
+JSON_COMPRESSION_LEVEL = int(os.getenv("JSON_COMPRESSION_LEVEL", 6))
+
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+CODEC_PLAIN = b"j"
+
+NO_DICTIONARY = 0
+REPORT_DICTIONARY_V1 = 1
+
+# Shape of a report body (see generate_report_background) with its fixed section
+# titles, serialized compactly like encode_json does. zlib favours matches near
+# the end of the dictionary, so the most repeated strings come last.
+# Frozen: rows compressed with id 1 depend on it.
+_REPORT_DICTIONARY_V1 = (
+    " customers customer users market product solution problem business value pricing"
+    " competitors competitive revenue growth strategy feedback adoption features platform"
+    " should could would consider focus ensure improve validate identify develop define"
+    " potential significant clear strong specific target segment pain points needs"
+    " The idea This is a to the of the and the in the for the with the on the that the"
+    " to ensure that in order to as well as such as for example based on the answers"
+    ' {"idea_name":"","overall_score":,"report_overview":"","sections":['
+    '{"category":"Target audience","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Problem Identification","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Consequence of not solving the problem","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Articulate solution","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Before & After","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Key benefits & Differentiation","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Market Opportunity","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Competitive Advantage","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Customer Adoption Potential","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Success Metrics & Goals","score":0,"max_score":9,"weighted_score":9,"insight":"","recommendations":["",""]},'
+    '{"category":"Feasibility","score":0,"max_score":10,"weighted_score":10,"insight":"","recommendations":["",""]}'
+    '],"strategic_next_steps":["","",""]}'
+    ',"max_score":9,"weighted_score":9,"insight":"'
+    '","recommendations":["'
+    '"]},{"category":"'
+).encode("utf-8")
+
+DICTIONARIES: Dict[int, bytes] = {
+    REPORT_DICTIONARY_V1: _REPORT_DICTIONARY_V1,
+}
+
+_zstd_dicts: Dict[int, Any] = {}
+
+
+def _zstandard():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def zstd_available() -> bool:
+    return _zstandard() is not None
+
+
+def _zstd_dict(zstandard, dictionary_id: int):
+    if dictionary_id not in _zstd_dicts:
+        _zstd_dicts[dictionary_id] = zstandard.ZstdCompressionDict(
+            DICTIONARIES[dictionary_id], dict_type=zstandard.DICT_TYPE_RAWCONTENT
+        )
+    return _zstd_dicts[dictionary_id]
+
+
+def _resolve_codec(codec: str) -> bytes:
+    if codec == "none":
+        return CODEC_PLAIN
+    if codec == "zstd":
+        if _zstandard() is not None:
+            return CODEC_ZSTD
+        print("[Compressed JSON] ⚠️ JSON_COMPRESSION=zstd but the zstandard package is not installed; using zlib")
+    elif codec != "zlib":
+        print(f"[Compressed JSON] ⚠️ Unknown JSON_COMPRESSION '{codec}'; using zlib")
+    return CODEC_ZLIB
+
+
+_DEFAULT_CODEC = _resolve_codec(JSON_COMPRESSION)
+
+
+def encode_json(value: Any, dictionary_id: int = NO_DICTIONARY, codec: Optional[bytes] = None,
+                level: int = JSON_COMPRESSION_LEVEL) -> bytes:
+    """Serialize and compress `value` into the stored format (header + payload)"""
+    codec = codec or _DEFAULT_CODEC
+    raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if codec == CODEC_PLAIN:
+        return CODEC_PLAIN + bytes([NO_DICTIONARY]) + raw
+    zdict = DICTIONARIES.get(dictionary_id)
+    if zdict is None:
+        dictionary_id = NO_DICTIONARY
+    if codec == CODEC_ZSTD:
+        zstandard = _zstandard()
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the zstandard package")
+        compressor = zstandard.ZstdCompressor(
+            level=level, dict_data=_zstd_dict(zstandard, dictionary_id) if zdict else None
+        )
+        return CODEC_ZSTD + bytes([dictionary_id]) + compressor.compress(raw)
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+    else:
+        compressor = zlib.compressobj(level)
+    return CODEC_ZLIB + bytes([dictionary_id]) + compressor.compress(raw) + compressor.flush()
+
+
+def decode_json(data: Any) -> Any:
+    """Inverse of `encode_json`; also accepts plain JSON text from before compression"""
+    if data is None:
+        return None
+    if isinstance(data, str):
+        return json.loads(data)
+    data = bytes(data)
+    codec, dictionary_id, payload = data[:1], data[1] if len(data) > 1 else 0, data[2:]
+    if codec == CODEC_PLAIN:
+        return json.loads(payload)
+    if codec == CODEC_ZLIB:
+        zdict = DICTIONARIES.get(dictionary_id) if dictionary_id else None
+        if dictionary_id and zdict is None:
+            raise ValueError(f"Unknown compression dictionary {dictionary_id}")
+        decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+        return json.loads(decompressor.decompress(payload) + decompressor.flush())
+    if codec == CODEC_ZSTD:
+        zstandard = _zstandard()
+        if zstandard is None:
+            raise RuntimeError("Reading zstd-compressed JSON requires the zstandard package")
+        if dictionary_id and dictionary_id not in DICTIONARIES:
+            raise ValueError(f"Unknown compression dictionary {dictionary_id}")
+        decompressor = zstandard.ZstdDecompressor(
+            dict_data=_zstd_dict(zstandard, dictionary_id) if dictionary_id else None
+        )
+        return json.loads(decompressor.decompress(payload))
+    # Legacy value: the JSON text itself
+    return json.loads(data)
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON value stored compressed in a binary column (LONGBLOB on MySQL)"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, dictionary_id: int = NO_DICTIONARY):
+        super().__init__()
+        self.dictionary_id = dictionary_id
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(mysql.LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return encode_json(value, self.dictionary_id)
+
+    def process_result_value(self, value, dialect):
+        return decode_json(value)
@@ -1,6 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.db_metrics import instrumented_pool_class, pool_metrics
 import os
 from dotenv import load_dotenv
 
@@ -39,9 +44,62 @@ if not SQLALCHEMY_DATABASE_URL:
 else:
     print(f"[app/database.py] ✅ Using DATABASE_URL from environment (loaded from {env_path_loaded if env_path_loaded else 'system env'}).")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+# Connection pool settings. Setting DB_POOL_PRE_PING=false drops the per-checkout
+# liveness query and relies on DB_POOL_RECYCLE (keep it below MySQL's wait_timeout).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+def _engine_options(url, pool_class, metrics) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite uses its own single-file pools; sizing options do not apply
+        return options
+    options.update({
+        "poolclass": instrumented_pool_class(pool_class, metrics),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT
+    })
+    return options
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL, QueuePool, pool_metrics["sync"]))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for routes that use `get_async_db`. The sync driver in DATABASE_URL is
+# swapped for its asyncio counterpart unless ASYNC_DATABASE_URL is set explicitly.
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _to_async_url(url: str):
+    parsed = make_url(url)
+    async_driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if not async_driver:
+        return parsed
+    return parsed.set(drivername=async_driver)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _to_async_url(SQLALCHEMY_DATABASE_URL)
+
+try:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        **_engine_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, pool_metrics["async"])
+    )
+    AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+except ImportError as e:
+    # Async driver (aiomysql) not installed; routes on get_async_db will return 503
+    print(f"[app/database.py] ⚠️ WARNING: Async database engine unavailable: {e}")
+    async_engine = None
+    AsyncSessionLocal = None
+
+# Sync routes (`def` endpoints) and run_in_threadpool calls share this many worker threads
+DB_THREADPOOL_SIZE = int(os.getenv("DB_THREADPOOL_SIZE", 40))
+
 Base = declarative_base()
 
 def get_db():
@@ -49,4 +107,20 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise HTTPException(status_code=503, detail="Async database driver is not installed")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def configure_threadpool(loop) -> None:
+    """Bound the thread pool that runs sync endpoints and offloaded DB work"""
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=DB_THREADPOOL_SIZE, thread_name_prefix="db"))
+    try:
+        # Newer Starlette versions offload through AnyIO's limiter instead of the loop executor
+        import anyio.to_thread
+        anyio.to_thread.current_default_thread_limiter().total_tokens = DB_THREADPOOL_SIZE
+    except Exception:
+        pass
\ No newline at end of file
@@ -0,0 +1,100 @@
+# app/db_metrics.py
+"""
+Connection pool instrumentation for the SQLAlchemy engines.
+
+`instrumented_pool_class` wraps a QueuePool class so every checkout records
+how long it waited for a connection, and whether it timed out. The numbers
+are exposed through `/metrics/db-pool`.
+"""
+import threading
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import exc
+
+# Upper bounds (in milliseconds) of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS: List[float] = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class PoolMetrics:
+    """Counters and a wait-time histogram for one connection pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None  # set once the engine has created its pool
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)  # last bucket is +Inf
+
+    def record_wait(self, seconds: float) -> None:
+        wait_ms = seconds * 1000
+        bucket = len(WAIT_BUCKETS_MS)
+        for i, upper in enumerate(WAIT_BUCKETS_MS):
+            if wait_ms <= upper:
+                bucket = i
+                break
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.wait_histogram[bucket] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.pool
+        with self._lock:
+            data: Dict[str, Any] = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "wait_histogram_ms": {
+                    **{f"le_{upper:g}": count for upper, count in zip(WAIT_BUCKETS_MS, self.wait_histogram)},
+                    "le_inf": self.wait_histogram[-1]
+                }
+            }
+        if pool is not None and hasattr(pool, "checkedout"):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_overflow": getattr(pool, "_max_overflow", None)
+            })
+        return data
+
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The pool is re-created on engine.dispose(); always report the live one
+        self.metrics.pool = self
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def instrumented_pool_class(base_class, metrics: PoolMetrics):
+    """Return a subclass of `base_class` (a QueuePool) that reports to `metrics`"""
+    return type(f"Instrumented{base_class.__name__}", (_InstrumentedPoolMixin, base_class), {"metrics": metrics})
+
+
+pool_metrics: Dict[str, PoolMetrics] = {
+    "sync": PoolMetrics("sync"),
+    "async": PoolMetrics("async"),
+}
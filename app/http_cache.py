@@ -0,0 +1,102 @@
+# app/http_cache.py
+"""
+Conditional GET support (ETag / If-None-Match / Cache-Control).
+
+Routes take a `ConditionalResponder` via `Depends(conditional_get(...))`
+with the Cache-Control policy for that endpoint, then either return
+`responder.not_modified(etag)` early (a 304 without building the payload)
+or `responder.respond(...)`. Payloads that rarely change can be encoded
+once into a `CachedPayload` and served as-is.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, NamedTuple, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+# max-age for the (static) questionnaire endpoints
+HTTP_CACHE_QUESTIONS_MAX_AGE = int(os.getenv("HTTP_CACHE_QUESTIONS_MAX_AGE", 300))
+
+# Cache-Control policies used by the routes
+CACHE_PRIVATE_QUESTIONS = f"private, max-age={HTTP_CACHE_QUESTIONS_MAX_AGE}"
+CACHE_PUBLIC_QUESTIONS = f"public, max-age={HTTP_CACHE_QUESTIONS_MAX_AGE}"
+CACHE_PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def encode_json(content: Any) -> bytes:
+    """Serialize `content` exactly like FastAPI's default JSONResponse"""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from a payload (bytes) or from version parts such as id/updated_at"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+class CachedPayload(NamedTuple):
+    """A JSON body encoded once, with its ETag"""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_content(cls, content: Any) -> "CachedPayload":
+        body = encode_json(content)
+        return cls(body, make_etag(body))
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+class ConditionalResponder:
+    """Builds 200/304 responses with ETag and Cache-Control for one request"""
+
+    def __init__(self, request: Request, cache_control: str):
+        self.request = request
+        self.cache_control = cache_control
+
+    def _headers(self, etag: str) -> dict:
+        return {"ETag": etag, "Cache-Control": self.cache_control}
+
+    def not_modified(self, etag: str) -> Optional[Response]:
+        """A 304 response if the client already holds `etag`, else None"""
+        if _etag_matches(self.request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=self._headers(etag))
+        return None
+
+    def respond(self, content: Any = None, etag: Optional[str] = None, payload: Optional[CachedPayload] = None) -> Response:
+        """Serve `payload`, or `content` encoded now (ETag from the body unless given)"""
+        if payload is None:
+            body = encode_json(content)
+            payload = CachedPayload(body, etag or make_etag(body))
+        return self.not_modified(payload.etag) or Response(
+            content=payload.body,
+            media_type="application/json",
+            headers=self._headers(payload.etag),
+        )
+
+
+def conditional_get(cache_control: str) -> Callable[[Request], ConditionalResponder]:
+    """Dependency factory: `responder: ConditionalResponder = Depends(conditional_get(...))`"""
+    def dependency(request: Request) -> ConditionalResponder:
+        return ConditionalResponder(request, cache_control)
+    return dependency
@@ -1,10 +1,13 @@
 # app/main.py
 import os
+import asyncio
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import auth_routes, user_routes, answer_routes, ideaboard_routes, trash_routes, archive_routes, report_routes, customerboard_routes, stripe_routes
+from app.database import engine, Base, async_engine, configure_threadpool
+from app.routers import auth_routes, user_routes, answer_routes, ideaboard_routes, trash_routes, archive_routes, report_routes, customerboard_routes, stripe_routes, metrics_routes
+from app.services.llm_service import LLMService
+from app.services.pdf_service import shutdown_pdf_executor
 from starlette.middleware.sessions import SessionMiddleware
 import secrets
 
@@ -63,6 +66,20 @@ app.add_middleware(
 def read_root():
     return {"message": "API is running!"}
 
+@app.on_event("startup")
+async def startup_event():
+    # Sync endpoints and offloaded DB calls run on a bounded thread pool
+    configure_threadpool(asyncio.get_running_loop())
+    # Open the pooled HTTP client used for all LLM calls
+    await LLMService.startup()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await LLMService.shutdown()
+    shutdown_pdf_executor()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 # Comment out automatic table creation to avoid conflicts with Alembic migrations
 # Use Alembic migrations instead for database schema management
 # Base.metadata.create_all(bind=engine)
@@ -77,6 +94,7 @@ app.include_router(archive_routes.router, prefix="/archive", tags=["Archive"])
 app.include_router(report_routes.router, prefix="/api/report", tags=["report"])
 app.include_router(customerboard_routes.router, prefix="/api/customerboard", tags=["customerboard"])
 app.include_router(stripe_routes.router, prefix="/api/stripe", tags=["stripe"])
+app.include_router(metrics_routes.router, prefix="/metrics", tags=["metrics"])
 
 
 @auth_routes.router.get("/debug-oauth")
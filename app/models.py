@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, DateTime , JSON, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, DateTime , JSON, Boolean, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, deferred
 from .database import Base
+from .compressed_json import CompressedJSON, REPORT_DICTIONARY_V1
 from datetime import datetime
 
 class User(Base):
@@ -77,6 +78,28 @@ class Answer(Base):
     user = relationship("User", back_populates="answers")
     question = relationship("Questionnaire", back_populates="answers")
 
+    # One answer per question, idea and user; lets step saves upsert in bulk
+    __table_args__ = (
+        UniqueConstraint("question_id", "ideaBoard_id", "user_id", name="uq_answers_question_idea_user"),
+        Index("ix_answers_idea_user", "ideaBoard_id", "user_id"),  # all answers of an idea (reports)
+    )
+
+
+class AnswerRevision(Base):
+    """Append-only history of an answer; `answers.answer` holds only the latest value"""
+    __tablename__ = "answer_revisions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    answer_id = Column(Integer, ForeignKey("answers.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    answer = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_answer_revisions_answer_created", "answer_id", "created_at"),
+        Index("ix_answer_revisions_created", "created_at"),  # compaction scans by age
+    )
+
 
 class IdeaBoard(Base):
     __tablename__ = "ideaboard"
@@ -100,7 +123,11 @@ class Trash(Base):
     idea_name = Column(String(255), nullable=False)
     idea_description = Column(Text, nullable=True)
     user_id = Column(Integer, nullable=False)
-    deleted_at = Column(DateTime)    
+    deleted_at = Column(DateTime, nullable=False)  # trash list keyset, so never NULL
+
+    __table_args__ = (
+        Index("ix_trash_user_deleted_at", "user_id", "deleted_at"),
+    )
 
 class Archive(Base):
     __tablename__ = "archive"
@@ -119,16 +146,35 @@ class Report(Base):
     idea_id = Column(Integer, ForeignKey("ideaboard.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
     status = Column(String(50))  # queued, processing, completed, failed
-    content = Column(JSON, nullable=True)
-    error_message = Column(Text, nullable=True)
+    # The report body can be large; it (and error_message) is only loaded when accessed,
+    # so status checks do not fetch it. Async sessions must select it explicitly.
+    # Stored compressed (see app/compressed_json.py) and decoded on load.
+    content = deferred(Column(CompressedJSON(REPORT_DICTIONARY_V1), nullable=True))
+    error_message = deferred(Column(Text, nullable=True))
     created_at = Column(DateTime)
     updated_at = Column(DateTime)
+    # Job queue bookkeeping used by the report worker (app/worker.py)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=True)
+    locked_by = Column(String(100), nullable=True)  # worker id holding the lease
+    locked_until = Column(DateTime, nullable=True)  # lease expiry, extended by heartbeats
+    heartbeat_at = Column(DateTime, nullable=True)
+    # Fingerprint of the inputs behind each section of `content` (section key -> sha256),
+    # so a regeneration only re-analyzes sections whose answers or personas changed
+    section_fingerprints = Column(JSON, nullable=True)
+    # How the pending run regenerates the report: "incremental" or "full" (None for a first run)
+    regeneration_mode = Column(String(20), nullable=True)
+
+    __table_args__ = (
+        Index("ix_reports_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_reports_idea_status", "idea_id", "status"),
+    )
 
 class CustomerPersona(Base):
     __tablename__ = "customer_personas"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     persona_name = Column(String(255), nullable=False)
     tag = Column(String(100), nullable=True)
     # 1. Personal Information
@@ -190,4 +236,30 @@ class IdeaPersonaLink(Base):
     # Relationships
     idea = relationship("IdeaBoard")
     persona = relationship("CustomerPersona")
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        UniqueConstraint("idea_id", "persona_id", name="uq_idea_persona_links_idea_persona"),
+    )
+
+
+class LLMCacheEntry(Base):
+    """LLM responses keyed by a hash of the normalized prompt (see app/services/llm_cache.py)"""
+    __tablename__ = "llm_response_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 of the normalized prompt
+    model = Column(String(100), nullable=True)
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True, nullable=False)
+
+
+class RevokedToken(Base):
+    """Logged-out JWTs by hash, kept until the token expires (see app/blacklist.py)"""
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 of the raw JWT
+    revoked_at = Column(DateTime, default=datetime.utcnow, index=True)  # Bloom filter syncs read new rows by it
+    expires_at = Column(DateTime, index=True, nullable=False)  # token's own `exp`; row can be purged after it
@@ -0,0 +1,169 @@
+# app/pagination.py
+"""
+Cursor (keyset) pagination for list endpoints.
+
+Routes take `page: CursorParams = Depends()` and fetch `page.limit + 1` rows
+ordered by a unique key, filtering on the key values of the last row of the
+previous page (decoded from `page.cursor`) instead of using OFFSET. If the
+extra row came back there is a next page, and its cursor is sent in the
+X-Next-Cursor response header. Cursors are opaque to clients.
+
+Pages hold PAGINATION_DEFAULT_LIMIT rows unless `?limit=` says otherwise;
+endpoints that had their own page size keep it via `cursor_params()`.
+Whenever a page is truncated (there is a next page), or on
+`?include_total=true`, all matching rows are counted into X-Total-Count, so
+clients relying on the old unbounded lists can tell rows are missing.
+`FieldsParams` handles `?fields=a,b`: only those columns are loaded
+(`load_only`) and returned.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query as ORMQuery, load_only
+
+PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", 50))
+PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 500))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def _encode_value(value: Any) -> Any:
+    return {"$dt": value.isoformat()} if isinstance(value, datetime) else value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Opaque cursor for the key values of the last row of a page"""
+    payload = json.dumps({key: _encode_value(value) for key, value in values.items()}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, dict):
+            raise ValueError("cursor is not an object")
+        return {key: _decode_value(value) for key, value in values.items()}
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_after(keys: Sequence[Any], values: Sequence[Any]):
+    """Filter for rows after `values` in ascending `keys` order: (a, b) > (x, y)"""
+    clauses = []
+    for i, key in enumerate(keys):
+        equal = [keys[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, key > values[i]))
+    return or_(*clauses)
+
+
+class CursorParams:
+    """`?limit=&cursor=&include_total=` query parameters of a cursor-paginated endpoint"""
+
+    def __init__(
+        self,
+        limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+        cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+        include_total: bool = Query(False, description="Count all matching rows into X-Total-Count")
+    ):
+        self.limit = limit
+        self.cursor: Optional[Dict[str, Any]] = decode_cursor(cursor) if cursor else None
+        self.include_total = include_total
+
+    def cursor_value(self, key: str, cast: Optional[Callable[[Any], Any]] = None) -> Any:
+        """A key value from the cursor, or a 400 if the cursor does not carry it"""
+        if self.cursor is None or key not in self.cursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        try:
+            return cast(self.cursor[key]) if cast else self.cursor[key]
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    def split_page(self, rows: Sequence[Any], keys: Sequence[str]) -> Tuple[List[Any], Optional[str]]:
+        """Trim the extra row fetched with `limit + 1`; returns (page rows, next cursor)"""
+        page = list(rows[:self.limit])
+        if len(rows) <= self.limit or not page:
+            return page, None
+        last = page[-1]
+        return page, encode_cursor({key: getattr(last, key) for key in keys})
+
+    def paginate(self, query: ORMQuery, keys: Sequence[Any], response: Response, skip: int = 0) -> List[Any]:
+        """One page of `query` in ascending `keys` order (unique together, e.g. ending with the id).
+
+        Sets the X-Next-Cursor header, and X-Total-Count if the page was
+        truncated or the count was asked for. `skip` is an OFFSET kept for old
+        clients; it only applies without a cursor. The keys must not be NULL.
+        """
+        names = [key.key for key in keys]
+        page_query = query
+        if self.cursor:
+            page_query = page_query.filter(keyset_after(keys, [self.cursor_value(name) for name in names]))
+        page_query = page_query.order_by(*keys)
+        if skip and not self.cursor:
+            page_query = page_query.offset(skip)
+        rows, next_cursor = self.split_page(page_query.limit(self.limit + 1).all(), names)
+        if self.include_total or next_cursor:
+            response.headers[TOTAL_COUNT_HEADER] = str(query.order_by(None).count())
+        set_next_cursor(response, next_cursor)
+        return rows
+
+
+def cursor_params(default_limit: int) -> type:
+    """`CursorParams` with its own default page size, for endpoints that already had one"""
+
+    class DefaultLimitCursorParams(CursorParams):
+        def __init__(
+            self,
+            limit: int = Query(default_limit, ge=1, le=PAGINATION_MAX_LIMIT),
+            cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+            include_total: bool = Query(False, description="Count all matching rows into X-Total-Count")
+        ):
+            super().__init__(limit, cursor, include_total)
+
+    return DefaultLimitCursorParams
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+class FieldsParams:
+    """`?fields=a,b` sparse fieldset of a list endpoint"""
+
+    def __init__(self, fields: Optional[str] = Query(None, description="Comma-separated fields to return")):
+        names = [name.strip() for name in (fields or "").split(",") if name.strip()]
+        self.names: Optional[List[str]] = list(dict.fromkeys(names)) or None
+
+    def apply(self, query: ORMQuery, model: Any, schema: Any, keys: Sequence[Any] = ()) -> ORMQuery:
+        """Load only the requested columns (plus the pagination `keys`); fields must be in `schema`"""
+        if not self.names:
+            return query
+        unknown = [name for name in self.names if name not in schema.__fields__ or not hasattr(model, name)]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        columns = [getattr(model, name) for name in self.names]
+        columns += [key for key in keys if key.key not in self.names]
+        return query.options(load_only(*columns))
+
+    def render(self, rows: Sequence[Any], response: Response) -> Any:
+        """`rows` as-is for the response model, or only the requested fields of each"""
+        if not self.names:
+            return rows
+        content = [{name: getattr(row, name) for name in self.names} for row in rows]
+        # A partial row does not fit the response model, so bypass it (keeping the page headers)
+        return JSONResponse(jsonable_encoder(content), headers=dict(response.headers))
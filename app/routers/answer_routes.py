@@ -1,79 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.auth import get_current_user  # Assuming you're using auth to get the current user
 from app.models import Answer, User
 from app import schemas
-from app.database import get_db
-from typing import Dict, Any, List
+from app.database import get_db, SessionLocal
+from app.pagination import CursorParams, set_next_cursor
+from app.services.answer_service import AnswerService
+from typing import Dict, Any, Iterator, List, Optional
 import json
 from datetime import datetime
 
 router = APIRouter()
 
 # Route to save an answer (POST /answers)
-@router.post("/answers", response_model=schemas.AnswerResponse)
-async def save_answer(
-    answer: schemas.AnswerCreate,
+@router.post("/answers", response_model=schemas.AnswerPublic)
+def save_answer(
+    answer: schemas.AnswerSubmit,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
-        # Check if an answer already exists for the same question_id and ideaBoard_id
-        existing_answer = db.query(Answer).filter(
-            Answer.question_id == answer.question_id,
-            Answer.ideaBoard_id == answer.ideaBoard_id
-        ).first()
-
-        if existing_answer:
-            # Handle cases where the answer is not a list
-            if isinstance(existing_answer.answer, dict):
-                # Convert existing dictionary to a list
-                existing_answer_data = [existing_answer.answer]
-            elif isinstance(existing_answer.answer, list):
-                existing_answer_data = existing_answer.answer
-            else:
-                # If it's neither, raise an error
-                raise HTTPException(status_code=400, detail="Existing answer format is invalid")
-
-            # Append the new answer to the existing data
-            new_answer_data = answer.answer  # This is already in JSON format
-            existing_answer_data.append(new_answer_data)
-
-            # Update the record in the database
-            existing_answer.answer = existing_answer_data  # Directly assign the updated list
-            existing_answer.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(existing_answer)
-            return existing_answer
-        else:
-            # If no existing answer is found, create a new one
-            db_answer = Answer(
-                **answer.dict(),
-                user_id=current_user.id,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            db.add(db_answer)
-            db.commit()
-            db.refresh(db_answer)
-            return db_answer
+        # The answers row keeps only the latest value; earlier submissions live in answer_revisions
+        db_answer = AnswerService.save_answer(
+            db, answer.question_id, answer.ideaBoard_id, current_user.id, answer.answer
+        )
+        db.commit()
+        db.refresh(db_answer)
+        return db_answer
     except IntegrityError as e:
         db.rollback()
         raise HTTPException(status_code=400, detail="Database error: Unable to save answer") from e
 
-# Route to get all answers or by question ID (GET /answers)
+# Columns returned by the listing; plain rows keep the session's identity map empty
+_ANSWER_COLUMNS = (
+    Answer.id,
+    Answer.question_id,
+    Answer.ideaBoard_id,
+    Answer.answer,
+    Answer.created_at,
+    Answer.updated_at
+)
+ANSWER_EXPORT_BATCH_SIZE = 500
+
+
+def _user_answers_query(db: Session, user_id: int, idea_id: Optional[int], question_id: Optional[int]):
+    query = db.query(*_ANSWER_COLUMNS).filter(Answer.user_id == user_id)
+    if idea_id is not None:
+        query = query.filter(Answer.ideaBoard_id == idea_id)
+    if question_id is not None:
+        query = query.filter(Answer.question_id == question_id)
+    return query.order_by(Answer.id)
+
+
+def _export_answers_ndjson(user_id: int, idea_id: Optional[int], question_id: Optional[int], after_id: Optional[int]) -> Iterator[bytes]:
+    """Yield the user's answers as NDJSON lines, fetched in keyset batches of ANSWER_EXPORT_BATCH_SIZE.
+
+    Each batch is its own `id > last id` query rather than one streamed result,
+    as the default driver (mysql-connector) has no server-side cursors, so only
+    one batch is ever held in memory.
+    """
+    db = SessionLocal()
+    try:
+        query = _user_answers_query(db, user_id, idea_id, question_id)
+        while True:
+            batch_query = query.filter(Answer.id > after_id) if after_id is not None else query
+            rows = batch_query.limit(ANSWER_EXPORT_BATCH_SIZE).all()
+            # Return the connection to the pool while the batch is sent
+            db.rollback()
+            for row in rows:
+                yield (json.dumps(jsonable_encoder(row._asdict()), ensure_ascii=False) + "\n").encode("utf-8")
+            if len(rows) < ANSWER_EXPORT_BATCH_SIZE:
+                break
+            after_id = rows[-1].id
+    finally:
+        db.close()
+
+
+# Route to list the current user's answers (GET /answers)
 @router.get("/answers", response_model=List[schemas.AnswerPublic])
-async def get_answers(question_id: int = None, 
+def get_answers(response: Response,
+                question_id: Optional[int] = None,
+                idea_id: Optional[int] = None,
+                format: str = Query("json", regex="^(json|ndjson)$"),
+                page: CursorParams = Depends(),
                 db: Session = Depends(get_db),
                 current_user: User = Depends(get_current_user)):
-    # If question_id is provided, filter by it; otherwise, get all answers
-    if question_id:
-        answers = db.query(Answer).filter(Answer.question_id == question_id).all()
-    else:
-        answers = db.query(Answer).all()
+    """List the current user's answers, optionally for one idea and/or question.
+
+    Pages are ordered by id; pass the X-Next-Cursor header of a page as
+    `cursor` to get the next one. `format=ndjson` streams every remaining
+    answer (from `cursor`, if given) as newline-delimited JSON instead.
+    """
+    if format == "ndjson":
+        after_id = page.cursor_value("id", int) if page.cursor else None
+        # The export opens its own session; release the request's connection now
+        db.close()
+        return StreamingResponse(
+            _export_answers_ndjson(current_user.id, idea_id, question_id, after_id),
+            media_type="application/x-ndjson"
+        )
+
+    query = _user_answers_query(db, current_user.id, idea_id, question_id)
+    if page.cursor:
+        query = query.filter(Answer.id > page.cursor_value("id", int))
+    answers, next_cursor = page.split_page(query.limit(page.limit + 1).all(), ["id"])
 
-    if not answers:
+    if not answers and not page.cursor:
         raise HTTPException(status_code=404, detail="No answers found")
 
-    return answers
+    set_next_cursor(response, next_cursor)
+    return [row._asdict() for row in answers]
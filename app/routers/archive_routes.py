@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app.database import get_db
 from app.models import IdeaBoard, Archive, User
 from app.schemas import ArchiveSchema, MessageResponse
+from app.pagination import CursorParams, FieldsParams
 from app.auth import get_current_user  # Assuming you're using auth to get the current user
 
 router = APIRouter()
@@ -43,14 +44,22 @@ def archive_idea(
 
 # Get all archived ideas for the current user
 @router.get("/get-all-archive", response_model=list[ArchiveSchema])
-def get_all_archive(user_and_db: tuple[User, Session] = Depends(get_user_and_db)):
+def get_all_archive(
+    response: Response,
+    page: CursorParams = Depends(),
+    fields: FieldsParams = Depends(),
+    user_and_db: tuple[User, Session] = Depends(get_user_and_db),
+):
     user, db = user_and_db  # Extract user and db from the tuple
 
-    archived_ideas = db.query(Archive).filter(Archive.user_id == user.id).all()
-    if not archived_ideas:
+    # Paged in id order; the next page is requested with the X-Next-Cursor header as `cursor`
+    keys = [Archive.id]
+    query = fields.apply(db.query(Archive).filter(Archive.user_id == user.id), Archive, ArchiveSchema, keys=keys)
+    archived_ideas = page.paginate(query, keys, response)
+    if not archived_ideas and not page.cursor:
         raise HTTPException(status_code=404, detail="No archived ideas found for this user")
 
-    return archived_ideas
+    return fields.render(archived_ideas, response)
 
 # Restore idea from archive back to ideaboard
 @router.post("/restore/{archive_id}", response_model=MessageResponse)
@@ -6,6 +6,7 @@ from app.database import get_db
 # get_current_user might be used for protected routes, not directly in OAuth flow here
 # from app.auth import get_current_user 
 from app.blacklist import blacklist_token # Keep if you have a manual logout for JWTs
+from app.user_cache import invalidate_user
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import logging
 from fastapi.responses import RedirectResponse, JSONResponse
@@ -214,6 +215,7 @@ def reset_password(request: schemas.ResetPassword, db: Session = Depends(get_db)
     hashed_password = auth.hash_password(request.new_password)
     user.password = hashed_password
     db.commit()
+    invalidate_user(email)
     
     # Log the success
     logger.info(f"Password successfully reset for user: {email}")
@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from app.auth import get_current_user
-from app.models import CustomerPersona, User, IdeaBoard, CustomerPersonaQuestionnaire, IdeaPersonaLink
+from app.models import CustomerPersona, User, IdeaBoard
 from app import schemas
 from app.database import get_db
+from app.services.persona_service import PersonaService
+from app.services.questionnaire_catalog import questionnaire_catalog
+from app.pagination import CursorParams, FieldsParams, cursor_params
+from app.http_cache import ConditionalResponder, conditional_get, CACHE_PUBLIC_QUESTIONS
 import json
 
 router = APIRouter()
 
+# /personas paged 100 at a time before it used cursors; keep that default
+PERSONAS_DEFAULT_LIMIT = 100
+
 @router.post("/personas/debug")
 async def debug_create_persona(
     persona_data: Dict[str, Any],
@@ -49,7 +56,7 @@ async def debug_create_persona(
         }
 
 @router.post("/personas/test-minimal")
-async def test_minimal_persona(
+def test_minimal_persona(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -87,7 +94,7 @@ async def test_minimal_persona(
         }
 
 @router.post("/personas", response_model=schemas.CustomerPersonaResponse)
-async def create_persona(
+def create_persona(
     persona: schemas.CustomerPersonaCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -154,21 +161,26 @@ async def create_persona(
         )
 
 @router.get("/personas", response_model=List[schemas.CustomerPersonaResponse])
-async def get_all_personas(
-    skip: int = 0, 
-    limit: int = 100,
+def get_all_personas(
+    response: Response,
+    skip: int = Query(0, ge=0, description="Deprecated: use the X-Next-Cursor header as `cursor`"),
+    page: CursorParams = Depends(cursor_params(PERSONAS_DEFAULT_LIMIT)),
+    fields: FieldsParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all customer personas for the current user"""
-    
+    """Get the current user's customer personas, a page at a time in id order.
+
+    List views should pass `fields` (e.g. `fields=id,persona_name,tag`) so the
+    JSON questionnaire columns are not loaded.
+    """
     query = db.query(CustomerPersona).filter(CustomerPersona.user_id == current_user.id)
-    
-    personas = query.offset(skip).limit(limit).all()
-    return personas
+    query = fields.apply(query, CustomerPersona, schemas.CustomerPersonaResponse, keys=[CustomerPersona.id])
+    personas = page.paginate(query, [CustomerPersona.id], response, skip=skip)
+    return fields.render(personas, response)
 
 @router.get("/personas/{persona_id}", response_model=schemas.CustomerPersonaResponse)
-async def get_persona(
+def get_persona(
     persona_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -186,7 +198,7 @@ async def get_persona(
     return persona
 
 @router.put("/personas/{persona_id}", response_model=schemas.CustomerPersonaResponse)
-async def update_persona(
+def update_persona(
     persona_id: int,
     persona_update: schemas.CustomerPersonaUpdate,
     db: Session = Depends(get_db),
@@ -216,7 +228,7 @@ async def update_persona(
     return db_persona
 
 @router.delete("/personas/{persona_id}", response_model=schemas.MessageResponse)
-async def delete_persona(
+def delete_persona(
     persona_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -239,7 +251,7 @@ async def delete_persona(
     return {"msg": "Customer persona deleted successfully"}
 
 @router.get("/personas/idea/{idea_id}", response_model=List[schemas.CustomerPersonaResponse])
-async def get_personas_by_idea(
+def get_personas_by_idea(
     idea_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -256,54 +268,13 @@ async def get_personas_by_idea(
         raise HTTPException(status_code=404, detail="Idea not found or not owned by the current user")
     
     # Get all personas linked to this idea through IdeaPersonaLink
-    persona_links = db.query(IdeaPersonaLink).filter(
-        IdeaPersonaLink.idea_id == idea_id
-    ).all()
-    
-    personas = []
-    for link in persona_links:
-        persona = db.query(CustomerPersona).filter(
-            CustomerPersona.id == link.persona_id
-        ).first()
-        if persona:
-            personas.append(persona)
-    
-    return personas
+    return PersonaService.get_personas_for_idea(db, idea_id)
 
 @router.get("/customerboard/questions", response_model=List[schemas.CustomerPersonaQuestionnaireResponse])
-async def get_customerboard_questions(
+def get_customerboard_questions(
     db: Session = Depends(get_db),
+    responder: ConditionalResponder = Depends(conditional_get(CACHE_PUBLIC_QUESTIONS))
 ):
     """Get all customerboard (persona) questions"""
-    questions = db.query(CustomerPersonaQuestionnaire).filter(CustomerPersonaQuestionnaire.status == 1).all()
-    result = []
-    for q in questions:
-        options = None
-        if q.range:
-            try:
-                options = json.loads(q.range)
-                if not isinstance(options, list):
-                    print(f"Invalid range for q_uuid {q.q_uuid}: {options}")
-                    options = None
-            except Exception as e:
-                print(f"Error parsing range for q_uuid {q.q_uuid}: {e}")
-                options = None
-        input_type = q.input_type
-        if input_type == "multiple_choice":
-            input_type = "checkbox-group"
-        elif input_type == "single_choice":
-            input_type = "radio-group"
-        result.append({
-            "q_uuid": q.q_uuid,
-            "text": q.text,
-            "input_type": input_type,
-            "range": options,
-            "category": q.category,
-            "id": q.id,
-            "body": q.body,
-            "remarks": q.remarks,
-            "status": q.status,
-            "created_at": q.created_at,
-            "updated_at": q.updated_at
-        })
-    return result 
\ No newline at end of file
+    # Options and input types are parsed and encoded once when the catalog loads
+    return responder.respond(payload=questionnaire_catalog.get(db).customer_questions_payload) 
\ No newline at end of file
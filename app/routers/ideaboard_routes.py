@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict
 from datetime import datetime
 from app.auth import get_current_user
 from app.models import IdeaBoard, User, Questionnaire, Answer, CustomerPersona, IdeaPersonaLink
 from app import schemas
-from app.database import get_db
+from app.database import get_db, get_async_db
+from app.services.persona_service import PersonaService
+from app.services.answer_service import AnswerService
+from app.services.questionnaire_catalog import questionnaire_catalog
+from app.pagination import CursorParams, FieldsParams
+from app.http_cache import ConditionalResponder, conditional_get, CACHE_PRIVATE_QUESTIONS
 import json
 
 router = APIRouter()
 
 @router.post("/create-idea/", response_model=schemas.IdeaResponse)
-async def create_idea(
+def create_idea(
     idea: schemas.IdeaCreate, 
     db: Session = Depends(get_db), 
     current_user: User = Depends(get_current_user)
@@ -32,30 +39,28 @@ async def create_idea(
         raise HTTPException(status_code=400, detail=f"Error creating idea: {str(e)}")
 
 @router.get("/questions/{step}", response_model=schemas.QuestionnaireResponse)
-async def get_step_questions(
+def get_step_questions(
     step: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    responder: ConditionalResponder = Depends(conditional_get(CACHE_PRIVATE_QUESTIONS))
 ):
     """Get questions for a specific step (1-11)"""
     if not 1 <= step <= 11:
         raise HTTPException(status_code=400, detail="Invalid step number")
     
-    questions = db.query(Questionnaire).filter(
-        Questionnaire.status == 1,
-        Questionnaire.q_uuid.startswith(f"step_{step}_")
-    ).all()
-    
-    if not questions:
+    # Served pre-encoded from the in-memory questionnaire catalog
+    payload = questionnaire_catalog.get(db).step_questions_payloads.get(step)
+    if payload is None:
         raise HTTPException(status_code=404, detail=f"No questions found for step {step}")
     
-    return {"step": step, "questions": questions}
+    return responder.respond(payload=payload)
 
 
     
 
 @router.post("/steps/{idea_id}/{step}", response_model=schemas.AnswerResponse)
-async def save_step_data(
+def save_step_data(
     idea_id: int,
     step: int,
     step_data: schemas.StepDataCreate,
@@ -73,44 +78,22 @@ async def save_step_data(
         raise HTTPException(status_code=404, detail="Idea not found")
     
     try:
-        # Get questions for this step to map IDs to database questions
-        questions = db.query(Questionnaire).filter(
-            Questionnaire.status == 1,
-            Questionnaire.q_uuid.startswith(f"step_{step}_")
-        ).all()
+        # Get questions for this step (from the in-memory catalog) to map IDs to database questions
+        questions = questionnaire_catalog.get(db).questions_for_step(step, active_only=True)
         
         # Create a mapping of question identifiers to DB IDs
         question_map = {q.q_uuid.split('_')[-1]: q.id for q in questions}
         
-        # Save each answer
-        for question in step_data.questions:
-            if question.id in question_map:
-                db_question_id = question_map[question.id]
-                
-                existing_answer = db.query(Answer).filter(
-                    Answer.question_id == db_question_id,
-                    Answer.ideaBoard_id == idea_id,
-                    Answer.user_id == current_user.id
-                ).first()
-                
-                answer_data = {
-                    "type": question.type,
-                    "value": question.value
-                }
-                
-                if existing_answer:
-                    existing_answer.answer = answer_data
-                    existing_answer.updated_at = datetime.utcnow()
-                else:
-                    new_answer = Answer(
-                        question_id=db_question_id,
-                    ideaBoard_id=idea_id,
-                    user_id=current_user.id,
-                    answer=answer_data,
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
-                db.add(new_answer)
+        # Save all answers of the step with a single bulk upsert
+        answers = {
+            question_map[question.id]: {
+                "type": question.type,
+                "value": question.value
+            }
+            for question in step_data.questions
+            if question.id in question_map
+        }
+        AnswerService.upsert_answers(db, idea_id, current_user.id, answers)
         
         # Update progress tracking
         if not idea.completed_steps:
@@ -146,15 +129,18 @@ async def save_step_data(
 @router.get("/progress/{idea_id}", response_model=schemas.IdeaProgressResponse)
 async def get_idea_progress(
     idea_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get the progress of an idea's questionnaire"""
     # Verify idea belongs to user
-    idea = db.query(IdeaBoard).filter(
-        IdeaBoard.id == idea_id,
-        IdeaBoard.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(IdeaBoard).where(
+            IdeaBoard.id == idea_id,
+            IdeaBoard.user_id == current_user.id
+        )
+    )
+    idea = result.scalars().first()
     
     if not idea:
         raise HTTPException(status_code=404, detail="Idea not found")
@@ -170,105 +156,40 @@ async def get_idea_progress(
     
 
 @router.get("/all-ideas/", response_model=List[schemas.IdeaResponse])
-async def get_all_ideas(
+def get_all_ideas(
+    response: Response,
+    page: CursorParams = Depends(),
+    fields: FieldsParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all ideas for the current user"""
-    ideas = db.query(IdeaBoard).filter(IdeaBoard.user_id == current_user.id).all()
-    return ideas  # The schemas.IdeaResponse should include current_step, is_complete fields
+    """Get the current user's ideas, a page at a time in id order (next page: X-Next-Cursor)"""
+    query = db.query(IdeaBoard).filter(IdeaBoard.user_id == current_user.id)
+    query = fields.apply(query, IdeaBoard, schemas.IdeaResponse, keys=[IdeaBoard.id])
+    ideas = page.paginate(query, [IdeaBoard.id], response)
+    return fields.render(ideas, response)  # The schemas.IdeaResponse should include current_step, is_complete fields
 
 # New endpoint with improved format
 @router.get("/steps/{step}", response_model=schemas.StepQuestionsResponse)
-async def get_step_data(
+def get_step_data(
     step: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    responder: ConditionalResponder = Depends(conditional_get(CACHE_PRIVATE_QUESTIONS))
 ):
     """Get questions for a specific step in frontend-friendly format"""
     if not 1 <= step <= 11:
         raise HTTPException(status_code=400, detail="Invalid step number")
     
-    questions = db.query(Questionnaire).filter(
-        Questionnaire.status == 1,
-        Questionnaire.q_uuid.startswith(f"step_{step}_")
-    ).all()
-    
-    if not questions:
+    # Options and question types are parsed and encoded once when the catalog loads
+    payload = questionnaire_catalog.get(db).step_data_payloads.get(step)
+    if payload is None:
         raise HTTPException(status_code=404, detail=f"No questions found for step {step}")
     
-    # Step titles mapping
-    step_titles = {
-        1: "Target Audience",
-        2: "Problem Identification",
-        3: "Consequence of not solving the problem",
-        4: "Articulate solution",
-        5: "Before & After",
-        6: "Key benefits & Differentiation",
-        7: "Market Opportunity",
-        8: "Competitive Advantage",
-        9: "Customer Adoption Potential",
-        10: "Success Metrics & Goals",
-        11: "Feasibility"
-    }
-    
-    # Step descriptions mapping
-    step_descriptions = {
-        1: "Knowing who you are building for is the foundation of your business. Let's identify your ideal customer.",
-        2: "The best businesses solve real problems. Let's define the problem you're solving.",
-        # Add descriptions for other steps
-    }
-    
-    # Process questions into frontend-friendly format
-    question_details = []
-    for q in questions:
-        # Extract the question ID from the q_uuid
-        # Assuming format: step_1_question_id
-        try:
-            parts = q.q_uuid.split('_')
-            question_id = parts[-1]
-        except:
-            question_id = f"q_{q.id}"
-            
-        # Parse range field if it contains options
-        options = None
-        if q.range:
-            try:
-                options_data = json.loads(q.range)
-                if isinstance(options_data, list):
-                    options = options_data
-                elif isinstance(options_data, dict) and "options" in options_data:
-                    options = options_data["options"]
-            except:
-                # If range is not valid JSON, ignore it
-                pass
-                
-        question_type = "text"
-        if q.input_type:
-            if q.input_type.lower() in ["checkbox", "multiple"]:
-                question_type = "multiple_choice"
-            elif q.input_type.lower() in ["radio", "single"]:
-                question_type = "single_choice"
-                
-        question_details.append(
-            schemas.QuestionDetail(
-                id=question_id,
-                question_text=q.text,
-                description=q.body if q.body else None,
-                question_type=question_type,
-                options=options
-            )
-        )
-    
-    return schemas.StepQuestionsResponse(
-        step_number=step,
-        title=step_titles.get(step, f"Step {step}"),
-        description=step_descriptions.get(step),
-        questions=question_details
-    )
+    return responder.respond(payload=payload)
 
 @router.post("/ideas/{idea_id}/link-persona", response_model=schemas.PersonaLinkResponse)
-async def link_persona_to_idea(
+def link_persona_to_idea(
     idea_id: int,
     persona_link: schemas.PersonaLinkCreate,
     db: Session = Depends(get_db),
@@ -322,7 +243,7 @@ async def link_persona_to_idea(
     }
 
 @router.get("/ideas/{idea_id}/personas", response_model=schemas.IdeaPersonasResponse)
-async def get_idea_personas(
+def get_idea_personas(
     idea_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -338,17 +259,7 @@ async def get_idea_personas(
         raise HTTPException(status_code=404, detail="Idea not found")
     
     # Get all linked personas
-    persona_links = db.query(IdeaPersonaLink).filter(
-        IdeaPersonaLink.idea_id == idea_id
-    ).all()
-    
-    personas = []
-    for link in persona_links:
-        persona = db.query(CustomerPersona).filter(
-            CustomerPersona.id == link.persona_id
-        ).first()
-        if persona:
-            personas.append(persona)
+    personas = PersonaService.get_personas_for_idea(db, idea_id)
     
     return {
         "idea_id": idea_id,
@@ -356,7 +267,7 @@ async def get_idea_personas(
     }
 
 @router.delete("/ideas/{idea_id}/personas/{persona_id}")
-async def unlink_persona_from_idea(
+def unlink_persona_from_idea(
     idea_id: int,
     persona_id: int,
     db: Session = Depends(get_db),
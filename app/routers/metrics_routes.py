@@ -0,0 +1,28 @@
+# app/routers/metrics_routes.py
+import hmac
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from app.db_metrics import pool_metrics
+from app.services.llm_resilience import llm_resilience
+
+router = APIRouter()
+
+# Shared secret that requests must send as X-Metrics-Token; without it the metrics are disabled
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+def verify_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_TOKEN is not set)")
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token, METRICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
+
+@router.get("/db-pool", dependencies=[Depends(verify_metrics_token)])
+def get_db_pool_metrics():
+    """Connection pool saturation for the sync and async database engines"""
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+
+@router.get("/llm", dependencies=[Depends(verify_metrics_token)])
+def get_llm_metrics():
+    """Circuit breaker state, rate limiter tokens and retry counters of the LLM client"""
+    return llm_resilience.snapshot()
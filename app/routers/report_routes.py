@@ -1,20 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Response
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
+from starlette.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from typing import List, Dict, Any, Optional
 from app.auth import get_current_user
-from app.models import Answer, User, IdeaBoard, Questionnaire, Report, CustomerPersona, IdeaPersonaLink
+from app.models import Answer, User, IdeaBoard, Report, CustomerPersona
 from app import schemas
-from app.database import get_db, SessionLocal
+from app.database import get_db, get_async_db, SessionLocal
 from datetime import datetime
+import asyncio
+import hashlib
 import json
+from collections import defaultdict
 import os
 import tempfile
+import time
+from urllib.parse import quote
 from app.services.llm_service import LLMService, VULTR_CHAT_MODEL
 from app.services.pdf_service import generate_report_pdf
+from app.services.report_queue import ReportQueue, PermanentJobError, REPORT_QUEUE_MODE
+from app.services.persona_service import PersonaService
+from app.services.questionnaire_catalog import questionnaire_catalog, QuestionEntry
+from app.services.report_events import report_events, ReportEvent
+from app.http_cache import ConditionalResponder, conditional_get, make_etag, CACHE_PRIVATE_REVALIDATE
 
 router = APIRouter()
 
+# Section analysis fan-out: "concurrent" runs up to REPORT_SECTION_CONCURRENCY
+# sections of a report at once, "sequential" analyzes them one by one.
+REPORT_SECTION_MODE = os.getenv("REPORT_SECTION_MODE", "concurrent").lower()
+REPORT_SECTION_CONCURRENCY = int(os.getenv("REPORT_SECTION_CONCURRENCY", 4))
+# Upper bound on section analyses in flight across all reports in this process
+REPORT_SECTION_GLOBAL_CONCURRENCY = int(os.getenv("REPORT_SECTION_GLOBAL_CONCURRENCY", 12))
+_section_semaphore = asyncio.Semaphore(max(1, REPORT_SECTION_GLOBAL_CONCURRENCY))
+# How often the progress stream checks the database when no events arrive in this
+# process (reports run by `python -m app.worker` only ever show up there)
+REPORT_EVENTS_POLL_SECONDS = float(os.getenv("REPORT_EVENTS_POLL_SECONDS", 2 if REPORT_QUEUE_MODE == "worker" else 15))
+REPORT_EVENTS_MAX_SECONDS = float(os.getenv("REPORT_EVENTS_MAX_SECONDS", 900))
+
 def calculate_section_score(answers: List[Any], max_score: int) -> int:
     """Calculate score for a section based on completeness and quality of answers"""
     if not answers:
@@ -28,14 +55,58 @@ def generate_insights(answers: Dict[str, Any], section: str) -> str:
     # For now, returning placeholder insights
     return f"Based on the provided answers, the {section} analysis shows strong potential..."
 
+# Regeneration modes accepted by `request_report_generation`
+REGENERATION_MODES = ("full", "incremental")
+
+def _fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _persona_fingerprint_fields(persona: CustomerPersona) -> List[Any]:
+    """The persona fields that end up in the section and overview prompts"""
+    return [
+        persona.id, persona.persona_name, persona.tag, persona.age_range, persona.role_occupation,
+        persona.industry_types, persona.goals, persona.challenges, persona.pain_points
+    ]
+
+def section_fingerprint(
+    section_info: Dict[str, Any],
+    section_questions: List[QuestionEntry],
+    section_answers: List[Answer],
+    linked_personas: List[CustomerPersona]
+) -> str:
+    """Fingerprint of everything a section analysis depends on"""
+    return _fingerprint(
+        VULTR_CHAT_MODEL,
+        section_info["title"],
+        section_info["max_score"],
+        [(q.id, q.text) for q in section_questions],
+        sorted(([a.question_id, a.answer] for a in section_answers), key=lambda pair: pair[0]),
+        [_persona_fingerprint_fields(p) for p in linked_personas]
+    )
+
 @router.post("/generate/{idea_id}", response_model=schemas.ReportRequestResponse)
-async def request_report_generation(
+def request_report_generation(
     idea_id: int,
     background_tasks: BackgroundTasks,
+    regenerate: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Request a report to be generated asynchronously"""
+    """Request a report to be generated asynchronously.
+
+    An existing completed report is returned as-is unless `regenerate` is
+    given: "incremental" re-analyzes only the sections whose answers or
+    personas changed since the last report (then re-runs the overview),
+    "full" re-analyzes every section without the LLM response cache.
+    Re-requesting a report that is not completed (e.g. one that failed)
+    without `regenerate` runs an incremental regeneration.
+    """
+    if regenerate is not None and regenerate not in REGENERATION_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid regenerate mode. Use one of: {', '.join(REGENERATION_MODES)}"
+        )
+
     # Verify idea belongs to user
     idea = db.query(IdeaBoard).filter(
         IdeaBoard.id == idea_id,
@@ -59,16 +130,20 @@ async def request_report_generation(
     
     if existing_report:
         # If report exists and is not stale, return its status
-        if existing_report.status == "completed":
+        if existing_report.status == "completed" and regenerate is None:
             return {
                 "report_id": existing_report.id,
                 "status": "completed",
                 "message": "Report already exists"
             }
         elif existing_report.status == "processing":
-            # Check if it's a stale request (more than 5 minutes old)
-            if (datetime.utcnow() - existing_report.updated_at).total_seconds() > 300:
-                existing_report.status = "queued"  # Reset stale request
+            # Check if it's a stale request (more than 5 minutes old). Worker-claimed
+            # reports hold a lease instead and are recovered by the queue once it expires.
+            if existing_report.locked_until is None and (datetime.utcnow() - existing_report.updated_at).total_seconds() > 300:
+                if REPORT_QUEUE_MODE == "worker":
+                    ReportQueue.enqueue(existing_report)
+                else:
+                    existing_report.status = "queued"  # Reset stale request
                 db.commit()
             
             return {
@@ -80,28 +155,29 @@ async def request_report_generation(
     # Create a new report record or update existing one
     if existing_report:
         report = existing_report
-        report.status = "queued"
-        report.updated_at = datetime.utcnow()
+        # Read by the generation run, which may happen later in the worker
+        report.regeneration_mode = regenerate or "incremental"
     else:
         report = Report(
             idea_id=idea_id,
             user_id=current_user.id,
-            status="queued",
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            created_at=datetime.utcnow()
         )
         db.add(report)
+    ReportQueue.enqueue(report)
         
     db.commit()
     db.refresh(report)
     
-    # Start the background task to generate the report
-    background_tasks.add_task(
-        generate_report_background, 
-        report.id, 
-        idea_id, 
-        current_user.id
-    )
+    # In worker mode the report stays queued in the database for `python -m app.worker`
+    if REPORT_QUEUE_MODE != "worker":
+        # Start the background task to generate the report
+        background_tasks.add_task(
+            generate_report_background, 
+            report.id, 
+            idea_id, 
+            current_user.id
+        )
     
     return {
         "report_id": report.id,
@@ -112,14 +188,20 @@ async def request_report_generation(
 @router.get("/status/{report_id}", response_model=schemas.ReportStatusResponse)
 async def check_report_status(
     report_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Check the status of a report generation request"""
-    report = db.query(Report).filter(
-        Report.id == report_id,
-        Report.user_id == current_user.id
-    ).first()
+    # Only the status columns; this is polled while a report is generated
+    result = await db.execute(
+        select(
+            Report.id, Report.status, Report.created_at, Report.updated_at, Report.error_message
+        ).where(
+            Report.id == report_id,
+            Report.user_id == current_user.id
+        )
+    )
+    report = result.first()
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
@@ -132,33 +214,149 @@ async def check_report_status(
         "error_message": report.error_message
     }
 
+def _get_report_status(db: Session, report_id: int, user_id: Optional[int] = None):
+    """(status, error_message) of a report, or None (runs in the thread pool)"""
+    query = db.query(Report.status, Report.error_message).filter(Report.id == report_id)
+    if user_id is not None:
+        query = query.filter(Report.user_id == user_id)
+    return query.first()
+
+def _poll_report_status(report_id: int):
+    db = SessionLocal()
+    try:
+        return _get_report_status(db, report_id)
+    finally:
+        db.close()
+
+def _format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    message = f"id: {event_id}\n" if event_id is not None else ""
+    return message + f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+def _format_report_event(event: ReportEvent) -> str:
+    return _format_sse(event.event, event.data, event.id)
+
+def _final_status_event(report_id: int, status: str, error_message: Optional[str]) -> str:
+    if status == "completed":
+        return _format_sse("completed", {"report_id": report_id})
+    return _format_sse("failed", {"report_id": report_id, "error": error_message})
+
+async def _report_event_stream(request: Request, report_id: int, status: str, last_event_id: Optional[int]):
+    """Server-sent events for one report until it completes or fails"""
+    running = status not in ("completed", "failed")
+    subscription, replay = report_events.subscribe(report_id, last_event_id, running=running)
+    try:
+        yield _format_sse("status", {"report_id": report_id, "status": status})
+        for event in replay:
+            if event.event == "superseded":
+                break  # the report is finished by another worker; poll it below
+            yield _format_report_event(event)
+            if event.is_terminal:
+                return
+        if not running:
+            row = await run_in_threadpool(_poll_report_status, report_id)
+            yield _final_status_event(report_id, status, row.error_message if row else None)
+            return
+
+        deadline = time.monotonic() + REPORT_EVENTS_MAX_SECONDS
+        while time.monotonic() < deadline and not await request.is_disconnected():
+            event = await subscription.get(REPORT_EVENTS_POLL_SECONDS)
+            if event is not None:
+                if event.event == "superseded":
+                    continue  # this process's run lost its lease; poll the database instead
+                yield _format_report_event(event)
+                if event.is_terminal:
+                    return
+                continue
+
+            # Nothing published in this process; the report may be running elsewhere
+            row = await run_in_threadpool(_poll_report_status, report_id)
+            if row is None:
+                return
+            if row.status in ("completed", "failed"):
+                yield _final_status_event(report_id, row.status, row.error_message)
+                return
+            if row.status != status:
+                status = row.status
+                yield _format_sse("status", {"report_id": report_id, "status": status})
+            else:
+                yield ": keep-alive\n\n"
+    finally:
+        report_events.unsubscribe(subscription)
+
+@router.get("/events/{report_id}")
+async def stream_report_events(
+    report_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream report generation progress as server-sent events.
+
+    Events: `status`, `processing`, `section_started`, `section_partial`,
+    `section_completed`, `section_failed`, `overview_partial`,
+    `overview_completed`, then `completed` or `failed`. The partial events
+    (text generated so far) are only sent when LLM streaming is enabled.
+    """
+    row = await run_in_threadpool(_get_report_status, db, report_id, current_user.id)
+    # The stream outlives the request's session; give its connection back to the pool now
+    await run_in_threadpool(db.close)
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    last_event_id = request.headers.get("last-event-id")
+    return StreamingResponse(
+        _report_event_stream(
+            request,
+            report_id,
+            row.status,
+            int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep nginx from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @router.get("/report/{idea_id}", response_model=schemas.ReportResponse)
 async def get_report(
     idea_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    responder: ConditionalResponder = Depends(conditional_get(CACHE_PRIVATE_REVALIDATE))
 ):
     """Get a completed report for an idea"""
     # Verify idea belongs to user
-    idea = db.query(IdeaBoard).filter(
-        IdeaBoard.id == idea_id,
-        IdeaBoard.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(IdeaBoard).where(
+            IdeaBoard.id == idea_id,
+            IdeaBoard.user_id == current_user.id
+        )
+    )
+    idea = result.scalars().first()
     
     if not idea:
         raise HTTPException(status_code=404, detail="Idea not found")
     
-    # Check if report exists and is completed
-    report = db.query(Report).filter(
-        Report.idea_id == idea_id,
-        Report.status == "completed"
-    ).first()
+    # Check if report exists and is completed (the content is only read once it is needed)
+    result = await db.execute(
+        select(Report.id, Report.updated_at).where(
+            Report.idea_id == idea_id,
+            Report.status == "completed"
+        )
+    )
+    report = result.first()
     
     if not report:
         # If no completed report exists, check if one is in progress
-        in_progress = db.query(Report).filter(
-            Report.idea_id == idea_id
-        ).first()
+        result = await db.execute(
+            select(Report.status).where(
+                Report.idea_id == idea_id
+            )
+        )
+        in_progress = result.first()
         
         if in_progress:
             raise HTTPException(
@@ -171,8 +369,31 @@ async def get_report(
                 detail="No report found. Please request a report generation first."
             )
     
-    # Return the report content
-    return report.content
+    # The stored content only changes when the report is regenerated (which bumps updated_at)
+    etag = make_etag("report", report.id, report.updated_at) if report.updated_at else None
+    if etag:
+        not_modified = responder.not_modified(etag)
+        if not_modified:
+            return not_modified
+    result = await db.execute(select(Report.content).where(Report.id == report.id))
+    # Returning a Response skips response_model, so apply the public schema here
+    # (drops internal fields such as max_score, coerces the scores)
+    content = schemas.ReportResponse(**result.scalar())
+    return responder.respond(content, etag=etag)
+
+def _get_idea_and_completed_report(db: Session, idea_id: int, user_id: int):
+    """Load the user's idea and its completed report (runs in the thread pool)"""
+    idea = db.query(IdeaBoard).filter(
+        IdeaBoard.id == idea_id,
+        IdeaBoard.user_id == user_id
+    ).first()
+    if not idea:
+        return None, None
+    report = db.query(Report).options(undefer(Report.content)).filter(
+        Report.idea_id == idea_id,
+        Report.status == "completed"
+    ).first()
+    return idea, report
 
 @router.get("/download/{idea_id}")
 async def download_report(
@@ -182,132 +403,314 @@ async def download_report(
 ):
     """Download report as PDF"""
     # Verify idea belongs to user
-    idea = db.query(IdeaBoard).filter(
-        IdeaBoard.id == idea_id,
-        IdeaBoard.user_id == current_user.id
-    ).first()
+    idea, report = await run_in_threadpool(_get_idea_and_completed_report, db, idea_id, current_user.id)
     
     if not idea:
         raise HTTPException(status_code=404, detail="Idea not found")
     
-    # Get the report
-    report = db.query(Report).filter(
-        Report.idea_id == idea_id,
-        Report.status == "completed"
-    ).first()
-    
     if not report or not report.content:
         raise HTTPException(status_code=404, detail="Report not found or incomplete")
     
     # Generate PDF
-    pdf_path = await generate_report_pdf(report.content, idea.idea_name)
+    # Rendered in a worker process and cached per report version
+    pdf = await generate_report_pdf(report.content, report.id, report.updated_at)
     
-    # Return the PDF file
-    return FileResponse(
-        path=pdf_path,
-        filename=f"{idea.idea_name.replace(' ', '_')}_Report.pdf",
-        media_type="application/pdf"
+    # Stream the PDF from memory (or its spooled temp file)
+    filename = f"{idea.idea_name.replace(' ', '_')}_Report.pdf"
+    quoted_filename = quote(filename)
+    if quoted_filename != filename:
+        content_disposition = f"attachment; filename*=utf-8''{quoted_filename}"
+    else:
+        content_disposition = f'attachment; filename="{filename}"'
+    return StreamingResponse(
+        pdf.iter_chunks(),
+        media_type="application/pdf",
+        headers={
+            "Content-Length": str(pdf.size),
+            "Content-Disposition": content_disposition
+        },
+        # iter_chunks closes the PDF's descriptor, unless the client disconnected mid-stream
+        background=BackgroundTask(pdf.close)
     )
 
-# Background task function
-async def generate_report_background(report_id: int, idea_id: int, user_id: int):
-    """Background task to generate a report"""
-    db = SessionLocal()
-    try:
-        # Update report status to processing
-        report = db.query(Report).filter(Report.id == report_id).first()
-        if not report:
-            return
-        report.status = "processing"
-        report.updated_at = datetime.utcnow()
-        db.commit()
+def _paired_questions_and_answers(section_questions: List[QuestionEntry], section_answers: List[Answer]):
+    """(question texts, answer values) aligned by question id, in questionnaire order.
+
+    A step's questions include unanswered and inactive ones, so the two lists
+    cannot be zipped by position.
+    """
+    position = {q.id: i for i, q in enumerate(section_questions)}
+    answered = sorted(
+        (a for a in section_answers if a.question_id in position),
+        key=lambda a: position[a.question_id]
+    )
+    return (
+        [section_questions[position[a.question_id]].text for a in answered],
+        [a.answer for a in answered]
+    )
+
+async def _analyze_section(
+    section_key: str,
+    section_info: Dict[str, Any],
+    section_questions: List[QuestionEntry],
+    section_answers: List[Answer],
+    linked_personas: List[CustomerPersona],
+    report_semaphore: asyncio.Semaphore,
+    report_id: Optional[int] = None,
+    use_cache: bool = True
+) -> Optional[Dict[str, Any]]:
+    """Run the LLM analysis for a single section, returning None if it fails"""
+    async with report_semaphore, _section_semaphore:
+        on_partial_insight = None
+        if report_id is not None:
+            report_events.publish(report_id, "section_started", {"section_key": section_key, "section": section_info["title"]})
+            # Only called when LLM streaming is enabled
+            def on_partial_insight(insight: str) -> None:
+                report_events.publish(report_id, "section_partial", {
+                    "section_key": section_key, "section": section_info["title"], "insight": insight
+                })
+        question_texts, answer_values = _paired_questions_and_answers(section_questions, section_answers)
+        try:
+            # Generate analysis using LLM with persona context
+            analysis = await LLMService.generate_section_analysis(
+                section_info["title"],
+                answer_values,
+                question_texts,
+                section_info["max_score"], # Pass max_score for the section
+                linked_personas,  # Pass linked personas for context
+                on_partial_insight,
+                use_cache=use_cache
+            )
+            result = {
+                "section": section_info["title"],
+                "score": analysis["score"],
+                "max_score": section_info["max_score"], # Store max_score
+                "weighted_score": section_info["max_score"], # Set weighted_score to max_score
+                "insight": analysis["insight"],
+                "recommendations": analysis["recommendations"],
+                "section_key": section_key,
+                "is_fallback": analysis.get("is_fallback", False)
+            }
+        except Exception as e:
+            # Log the error but continue with other sections
+            print(f"Error analyzing section {section_key}: {str(e)}")
+            if report_id is not None:
+                report_events.publish(report_id, "section_failed", {"section_key": section_key, "section": section_info["title"]})
+            return None
+        if report_id is not None:
+            report_events.publish(report_id, "section_completed", result)
+        return result
 
-        # Get idea details
-        idea = db.query(IdeaBoard).filter(IdeaBoard.id == idea_id).first()
+async def analyze_sections(
+    section_inputs: List[tuple],
+    linked_personas: List[CustomerPersona],
+    report_id: Optional[int] = None,
+    use_cache: bool = True
+) -> List[Dict[str, Any]]:
+    """Analyze all sections, fanning out to the LLM with bounded concurrency.
 
-        # Get all answers for this idea
-        answers = db.query(Answer).filter(
-            Answer.ideaBoard_id == idea_id,
-            Answer.user_id == user_id
-        ).all()
+    Results keep the order of `section_inputs`; sections that fail are left out.
+    Progress is published to the report's event stream when `report_id` is given.
+    With `use_cache` False every section is sent to the LLM, even if cached.
+    """
+    per_report_limit = REPORT_SECTION_CONCURRENCY if REPORT_SECTION_MODE == "concurrent" else 1
+    report_semaphore = asyncio.Semaphore(max(1, per_report_limit))
+    results = await asyncio.gather(*[
+        _analyze_section(section_key, section_info, section_questions, section_answers, linked_personas, report_semaphore, report_id, use_cache)
+        for section_key, section_info, section_questions, section_answers in section_inputs
+    ])
+    return [result for result in results if result is not None]
 
-        if not answers:
-            report.status = "failed"
-            report.error_message = "No answers found for this idea"
-            db.commit()
-            return
+def _load_report_inputs(db: Session, report_id: int, idea_id: int, user_id: int):
+    """Mark the report as processing and load everything the LLM stage needs.
 
-        # Get linked customer personas
-        persona_links = db.query(IdeaPersonaLink).filter(
-            IdeaPersonaLink.idea_id == idea_id
-        ).all()
-        
-        linked_personas = []
-        for link in persona_links:
-            persona = db.query(CustomerPersona).filter(
-                CustomerPersona.id == link.persona_id
-            ).first()
-            if persona:
-                linked_personas.append(persona)
-
-        # Group answers by section with max scores
-        sections = {
-            "target_audience": {"title": "Target audience", "max_score": 9},
-            "problem_identification": {"title": "Problem Identification", "max_score": 9},
-            "consequence_of_not_solving": {"title": "Consequence of not solving the problem", "max_score": 9},
-            "articulate_solution": {"title": "Articulate solution", "max_score": 9},
-            "before_after": {"title": "Before & After", "max_score": 9},
-            "key_benefits": {"title": "Key benefits & Differentiation", "max_score": 9},
-            "market_opportunity": {"title": "Market Opportunity", "max_score": 9},
-            "competitive_advantage": {"title": "Competitive Advantage", "max_score": 9},
-            "customer_adoption": {"title": "Customer Adoption Potential", "max_score": 9},
-            "success_metrics": {"title": "Success Metrics & Goals", "max_score": 9},
-            "feasibility": {"title": "Feasibility", "max_score": 10} # Last section has max_score 10
+    Runs in the thread pool; returns None if there is nothing to generate and
+    raises PermanentJobError if the report cannot be generated at all.
+    """
+    # Update report status to processing
+    report = db.query(Report).filter(Report.id == report_id).first()
+    if not report:
+        return None
+    report.status = "processing"
+    report.updated_at = datetime.utcnow()
+    db.commit()
+
+    # Get idea details
+    idea = db.query(IdeaBoard).filter(IdeaBoard.id == idea_id).first()
+    if not idea:
+        raise PermanentJobError("Idea not found")
+
+    # Get all answers for this idea
+    answers = db.query(Answer).filter(
+        Answer.ideaBoard_id == idea_id,
+        Answer.user_id == user_id
+    ).all()
+
+    if not answers:
+        raise PermanentJobError("No answers found for this idea")
+
+    # Get linked customer personas
+    linked_personas = PersonaService.get_personas_for_idea(db, idea_id)
+
+    # Report sections, keyed by the questionnaire step (`step_{n}_...`) they cover
+    sections = {
+        "target_audience": {"step": 1, "title": "Target audience", "max_score": 9},
+        "problem_identification": {"step": 2, "title": "Problem Identification", "max_score": 9},
+        "consequence_of_not_solving": {"step": 3, "title": "Consequence of not solving the problem", "max_score": 9},
+        "articulate_solution": {"step": 4, "title": "Articulate solution", "max_score": 9},
+        "before_after": {"step": 5, "title": "Before & After", "max_score": 9},
+        "key_benefits": {"step": 6, "title": "Key benefits & Differentiation", "max_score": 9},
+        "market_opportunity": {"step": 7, "title": "Market Opportunity", "max_score": 9},
+        "competitive_advantage": {"step": 8, "title": "Competitive Advantage", "max_score": 9},
+        "customer_adoption": {"step": 9, "title": "Customer Adoption Potential", "max_score": 9},
+        "success_metrics": {"step": 10, "title": "Success Metrics & Goals", "max_score": 9},
+        "feasibility": {"step": 11, "title": "Feasibility", "max_score": 10} # Last section has max_score 10
+    }
+
+    # Group answers by step in one pass using the in-memory questionnaire index
+    questionnaire = questionnaire_catalog.get(db)
+    answers_by_step: Dict[int, List[Answer]] = defaultdict(list)
+    for answer in answers:
+        step = questionnaire.step_for_question(answer.question_id)
+        if step is not None:
+            answers_by_step[step].append(answer)
+
+    # Sections analyzed last time whose inputs are unchanged are reused as-is,
+    # except on a full regeneration, which also skips the LLM response cache
+    full_regeneration = report.regeneration_mode == "full"
+    previous_fingerprints = {} if full_regeneration else (report.section_fingerprints or {})
+    previous_sections = {
+        section["category"]: section
+        for section in ((report.content or {}).get("sections") or [])
+    }
+
+    # Collect the questions and answers for every section up front so the
+    # LLM fan-out does not touch the database session
+    section_inputs = []
+    fingerprints: Dict[str, str] = {}
+    reused: Dict[str, Dict[str, Any]] = {}
+    for section_key, section_info in sections.items():
+        step = section_info["step"]
+        section_questions = questionnaire.questions_for_step(step)
+        section_answers = answers_by_step.get(step, [])
+        fingerprint = section_fingerprint(section_info, section_questions, section_answers, linked_personas)
+        fingerprints[section_key] = fingerprint
+        previous = previous_sections.get(section_info["title"])
+        if previous is not None and previous_fingerprints.get(section_key) == fingerprint:
+            reused[section_key] = {
+                "section": previous["category"],
+                "score": previous["score"],
+                "max_score": previous.get("max_score", section_info["max_score"]),
+                "weighted_score": previous.get("weighted_score", section_info["max_score"]),
+                "insight": previous["insight"],
+                "recommendations": previous["recommendations"],
+                "section_key": section_key,
+                "is_fallback": False,
+                "reused": True
+            }
+            continue
+        section_inputs.append((section_key, section_info, section_questions, section_answers))
+
+    # The overview also depends on the idea name and personas
+    fingerprints["overview"] = _fingerprint(
+        VULTR_CHAT_MODEL, idea.idea_name, [_persona_fingerprint_fields(p) for p in linked_personas]
+    )
+    previous_overview = None
+    if not section_inputs and report.content and previous_fingerprints.get("overview") == fingerprints["overview"]:
+        previous_overview = {
+            "overview": report.content.get("report_overview"),
+            "strategic_next_steps": report.content.get("strategic_next_steps", [])
         }
 
-        # Process each section with LLM
-        section_analyses = []
-        total_score = 0
+    if reused:
+        print(f"[Report Generation] ♻️ Report {report_id}: reusing {len(reused)} of {len(sections)} section analyses")
+    report_events.publish(report_id, "processing", {
+        "report_id": report_id,
+        "sections": [section_info["title"] for section_info in sections.values()],
+        "reused_sections": [section["section"] for section in reused.values()]
+    })
+    use_cache = not full_regeneration
+    return report, idea, section_inputs, linked_personas, fingerprints, reused, previous_overview, use_cache
 
-        for section_key, section_info in sections.items():
-            # Get questions and answers for this section
-            section_questions = db.query(Questionnaire).filter(
-                Questionnaire.q_uuid.startswith(f"step_{section_key}_")
-            ).all()
+def _holds_lease(db: Session, report_id: int, worker_id: Optional[str]) -> bool:
+    """Whether the run may still write its outcome (always, outside the worker).
 
-            section_answers = [
-                answer for answer in answers
-                if answer.question_id in [q.id for q in section_questions]
-            ]
+    Locks the report row until the caller commits, so the lease cannot move meanwhile.
+    """
+    if worker_id is None:
+        return True
+    locked_by = db.query(Report.locked_by).filter(Report.id == report_id).with_for_update().scalar()
+    if locked_by == worker_id:
+        return True
+    print(f"[Report Generation] ⚠️ Report {report_id}: lease lost by {worker_id}, discarding this run's result")
+    db.rollback()
+    return False
 
-            # Generate analysis using LLM with persona context
-            try:
-                analysis = await LLMService.generate_section_analysis(
-                    section_info["title"],
-                    [a.answer for a in section_answers],
-                    [q.text for q in section_questions],
-                    section_info["max_score"], # Pass max_score for the section
-                    linked_personas  # Pass linked personas for context
-                )
-                section_analyses.append({
-                    "section": section_info["title"],
-                    "score": analysis["score"],
-                    "max_score": section_info["max_score"], # Store max_score
-                    "weighted_score": section_info["max_score"], # Set weighted_score to max_score
-                    "insight": analysis["insight"],
-                    "recommendations": analysis["recommendations"]
-                })
-                total_score += analysis["score"]
-            except Exception as e:
-                # Log the error but continue with other sections
-                print(f"Error analyzing section {section_key}: {str(e)}")
-
-        # Generate strategic overview with persona context
-        strategic_analysis = await LLMService.generate_strategic_overview(
-            idea.idea_name,
-            section_analyses,
-            linked_personas  # Pass linked personas for context
-        )
+def _commit_report(db: Session, report_id: int, worker_id: Optional[str]) -> bool:
+    if not _holds_lease(db, report_id, worker_id):
+        return False
+    db.commit()
+    return True
+
+def _mark_report_failed(db: Session, report_id: int, error_message: str, worker_id: Optional[str] = None) -> bool:
+    db.rollback()
+    if not _holds_lease(db, report_id, worker_id):
+        return False
+    report = db.query(Report).filter(Report.id == report_id).first()
+    if report:
+        report.status = "failed"
+        report.error_message = error_message
+        report.updated_at = datetime.utcnow()
+    db.commit()
+    return True
+
+# Background task function
+async def generate_report_background(report_id: int, idea_id: int, user_id: int, worker_id: Optional[str] = None):
+    """Background task to generate a report.
+
+    Database work is offloaded to the thread pool so the event loop only
+    waits on the LLM calls. `worker_id` is set when run by `app.worker`: the
+    outcome is then only written while that worker still holds the job's lease.
+    Returns the outcome ("completed", "failed", "failed_permanently" or
+    "lease_lost"), or None if there was nothing to generate.
+    """
+    db = SessionLocal()
+    try:
+        loaded = await run_in_threadpool(_load_report_inputs, db, report_id, idea_id, user_id)
+        if loaded is None:
+            return
+        report, idea, section_inputs, linked_personas, fingerprints, reused, previous_overview, use_cache = loaded
+
+        for analysis in reused.values():
+            report_events.publish(report_id, "section_completed", analysis)
+
+        # Process each changed section with LLM, keeping the report's section order
+        analyzed = {
+            analysis["section_key"]: analysis
+            for analysis in await analyze_sections(section_inputs, linked_personas, report_id, use_cache)
+        }
+        section_analyses = [
+            reused.get(section_key) or analyzed[section_key]
+            for section_key in fingerprints
+            if section_key in reused or section_key in analyzed
+        ]
+        total_score = sum(analysis["score"] for analysis in section_analyses)
+
+        if previous_overview is not None:
+            # No section changed, so the previous overview still holds
+            strategic_analysis = previous_overview
+        else:
+            # Generate strategic overview with persona context
+            strategic_analysis = await LLMService.generate_strategic_overview(
+                idea.idea_name,
+                section_analyses,
+                linked_personas,  # Pass linked personas for context
+                lambda overview: report_events.publish(report_id, "overview_partial", {"overview": overview})
+            )
+        report_events.publish(report_id, "overview_completed", {
+            "overview": strategic_analysis["overview"],
+            "strategic_next_steps": strategic_analysis["strategic_next_steps"]
+        })
 
         # Save the report data
         report.content = {
@@ -327,22 +730,32 @@ async def generate_report_background(report_id: int, idea_id: int, user_id: int)
             ],
             "strategic_next_steps": strategic_analysis["strategic_next_steps"]
         }
+        # Fallback (failed) analyses get no fingerprint so the next regeneration retries them
+        kept = {analysis["section_key"] for analysis in section_analyses if not analysis["is_fallback"]}
+        if not strategic_analysis.get("is_fallback"):
+            kept.add("overview")
+        report.section_fingerprints = {
+            section_key: fingerprint for section_key, fingerprint in fingerprints.items() if section_key in kept
+        }
         report.status = "completed"
         report.updated_at = datetime.utcnow()
-        db.commit()
+        if not await run_in_threadpool(_commit_report, db, report_id, worker_id):
+            report_events.publish(report_id, "superseded", {"report_id": report_id, "reason": "lease_lost"})
+            return "lease_lost"
+        report_events.publish(report_id, "completed", {"report_id": report_id, "overall_score": total_score})
+        return "completed"
 
     except Exception as e:
         # If any error occurs, mark report as failed
         try:
-            report = db.query(Report).filter(Report.id == report_id).first()
-            if report:
-                report.status = "failed"
-                report.error_message = str(e)
-                report.updated_at = datetime.utcnow()
-                db.commit()
+            if not await run_in_threadpool(_mark_report_failed, db, report_id, str(e), worker_id):
+                report_events.publish(report_id, "superseded", {"report_id": report_id, "reason": "lease_lost"})
+                return "lease_lost"
         except:
             pass
+        report_events.publish(report_id, "failed", {"report_id": report_id, "error": str(e)})
         print(f"Error generating report: {str(e)}")
+        return "failed_permanently" if isinstance(e, PermanentJobError) else "failed"
     finally:
         db.close()
 
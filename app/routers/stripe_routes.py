@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User
 from app.auth import get_current_user
+from app.user_cache import invalidate_user
 from datetime import datetime
 import stripe
 from app.services.subscription_service import SubscriptionService
@@ -20,6 +21,7 @@ from fastapi.responses import JSONResponse
 import json
 from typing import Optional
 from fastapi.security import HTTPBearer
+from starlette.concurrency import run_in_threadpool
 
 # Robust .env loading (similar to llm_service.py)
 possible_env_paths = [
@@ -67,7 +69,7 @@ async def get_subscription_plans():
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/create-checkout-session", response_model=SubscriptionCreationResponse)
-async def create_checkout_session(
+def create_checkout_session(
     price_id: str,
     user_email: str,
     current_user: User = Depends(get_current_user),
@@ -92,6 +94,7 @@ async def create_checkout_session(
             )
             current_user.stripe_customer_id = customer.id
             db.commit()
+            invalidate_user(current_user.email)
         
         # Create checkout session
         session = stripe.checkout.Session.create(
@@ -117,35 +120,8 @@ async def create_checkout_session(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/webhook")
-async def stripe_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    payload = await request.body()
-    sig_header = request.headers.get("stripe-signature")
-
-    # Debug output for troubleshooting
-    print(f"[Stripe Webhook] 🔥 Incoming webhook request")
-    print(f"[Stripe Webhook] 📝 Signature header: {'Present' if sig_header else 'MISSING'}")
-    print(f"[Stripe Webhook] 🔒 Using webhook secret: {'Set' if STRIPE_WEBHOOK_SECRET else 'NOT SET'}")
-
-    try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, STRIPE_WEBHOOK_SECRET
-        )
-        print(f"[Stripe Webhook] ✅ Event signature verified successfully")
-    except ValueError as e:
-        print(f"[Stripe Webhook] ❌ Invalid payload: {e}")
-        raise HTTPException(status_code=400, detail="Invalid payload")
-    except stripe.error.SignatureVerificationError as e:
-        print(f"[Stripe Webhook] ❌ Signature verification failed: {e}")
-        raise HTTPException(status_code=400, detail="Invalid signature")
-
-    # Debug: Print event type
-    print(f"[Stripe Webhook] 🎯 Event type: {event['type']}")
-
+def _handle_stripe_event(event, db: Session, background_tasks: BackgroundTasks) -> None:
+    """Apply a verified Stripe event to the database (blocking; runs in the thread pool)"""
     # Handle various webhook events
     if event['type'] == 'checkout.session.completed':
         session = event['data']['object']
@@ -195,6 +171,7 @@ async def stripe_webhook(
             user.current_period_end = current_period_end
             user.trial_end = trial_end
             db.commit()
+            invalidate_user(user.email)
             print(f"[Stripe Webhook] ✅ User {user.id} updated successfully - Status: {subscription['status']}, Plan: {product['name']}")
         else:
             print(f"[Stripe Webhook] ❌ No user found with ID: {user_id}")
@@ -220,6 +197,7 @@ async def stripe_webhook(
             user.current_period_end = None
             user.trial_end = None
             db.commit()
+            invalidate_user(user.email)
     
     elif event['type'] == 'customer.subscription.updated':
         subscription = event['data']['object']
@@ -234,6 +212,7 @@ async def stripe_webhook(
             user.current_period_end = datetime.fromtimestamp(subscription['current_period_end'])
             user.trial_end = datetime.fromtimestamp(subscription['trial_end']) if subscription.get('trial_end') else None
             db.commit()
+            invalidate_user(user.email)
     
     elif event['type'] == 'invoice.payment_failed':
         invoice = event['data']['object']
@@ -244,6 +223,7 @@ async def stripe_webhook(
         if user:
             user.subscription_status = "past_due"
             db.commit()
+            invalidate_user(user.email)
             
             # TODO: Send payment failed email to user
             background_tasks.add_task(
@@ -253,10 +233,42 @@ async def stripe_webhook(
                 currency=invoice['currency']
             )
 
+@router.post("/webhook")
+async def stripe_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    payload = await request.body()
+    sig_header = request.headers.get("stripe-signature")
+
+    # Debug output for troubleshooting
+    print(f"[Stripe Webhook] 🔥 Incoming webhook request")
+    print(f"[Stripe Webhook] 📝 Signature header: {'Present' if sig_header else 'MISSING'}")
+    print(f"[Stripe Webhook] 🔒 Using webhook secret: {'Set' if STRIPE_WEBHOOK_SECRET else 'NOT SET'}")
+
+    try:
+        event = stripe.Webhook.construct_event(
+            payload, sig_header, STRIPE_WEBHOOK_SECRET
+        )
+        print(f"[Stripe Webhook] ✅ Event signature verified successfully")
+    except ValueError as e:
+        print(f"[Stripe Webhook] ❌ Invalid payload: {e}")
+        raise HTTPException(status_code=400, detail="Invalid payload")
+    except stripe.error.SignatureVerificationError as e:
+        print(f"[Stripe Webhook] ❌ Signature verification failed: {e}")
+        raise HTTPException(status_code=400, detail="Invalid signature")
+
+    # Debug: Print event type
+    print(f"[Stripe Webhook] 🎯 Event type: {event['type']}")
+
+    # Stripe lookups and DB writes are blocking, keep them off the event loop
+    await run_in_threadpool(_handle_stripe_event, event, db, background_tasks)
+
     return {"status": "success"}
 
 @router.post("/cancel-subscription")
-async def cancel_subscription(
+def cancel_subscription(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -273,13 +285,14 @@ async def cancel_subscription(
         current_user.current_period_end = None
         current_user.trial_end = None
         db.commit()
+        invalidate_user(current_user.email)
         
         return {"message": "Subscription canceled successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/create-portal-session", response_model=SubscriptionPortalResponse)
-async def create_portal_session(
+def create_portal_session(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -305,7 +318,7 @@ async def get_subscription_status(
     """Get the current user's subscription status"""
     try:
         # Update the user's subscription data from Stripe
-        await SubscriptionService.update_user_subscription_from_stripe(current_user, db)
+        await run_in_threadpool(SubscriptionService.update_user_subscription_from_stripe, current_user, db)
         
         # Get subscription details from our service
         subscription_details = await SubscriptionService.get_user_subscription_details(current_user)
@@ -328,7 +341,8 @@ async def update_subscription(
 ):
     """Update the subscription to a new plan"""
     try:
-        result = await SubscriptionService.process_subscription_change(
+        result = await run_in_threadpool(
+            SubscriptionService.process_subscription_change,
             user=current_user,
             new_price_id=update_request.price_id,
             db=db
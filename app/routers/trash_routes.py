@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Response, BackgroundTasks
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from app.database import get_db
 from app.models import IdeaBoard, Trash, User
 from app.schemas import TrashSchema, MessageResponse
+from app.pagination import CursorParams, FieldsParams
 from app.auth import get_current_user  # Assuming you're using auth to get the current user
 
 router = APIRouter()
@@ -47,14 +48,22 @@ def move_to_trash(
 
 # Get all trashed ideas for the current user
 @router.get("/get-all-trash", response_model=list[TrashSchema])
-def get_all_trash(user_and_db: tuple[User, Session] = Depends(get_user_and_db)):
+def get_all_trash(
+    response: Response,
+    page: CursorParams = Depends(),
+    fields: FieldsParams = Depends(),
+    user_and_db: tuple[User, Session] = Depends(get_user_and_db),
+):
     user, db = user_and_db  # Extract user and db from the tuple
 
-    trashed_ideas = db.query(Trash).filter(Trash.user_id == user.id).all()
-    if not trashed_ideas:
+    # Paged oldest first; the next page is requested with the X-Next-Cursor header as `cursor`
+    keys = [Trash.deleted_at, Trash.id]
+    query = fields.apply(db.query(Trash).filter(Trash.user_id == user.id), Trash, TrashSchema, keys=keys)
+    trashed_ideas = page.paginate(query, keys, response)
+    if not trashed_ideas and not page.cursor:
         raise HTTPException(status_code=404, detail="No trashed ideas found for this user")
 
-    return trashed_ideas
+    return fields.render(trashed_ideas, response)
 
 # Restore idea from trash back to ideaboard
 @router.post("/restore/{trash_id}", response_model=MessageResponse)
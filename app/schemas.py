@@ -74,6 +74,11 @@ class QuestionnaireResponse(BaseModel):
 class AnswerCreate(BaseModel):
     answers: Dict[int, Any]  # question_id -> answer_data
 
+class AnswerSubmit(BaseModel):
+    question_id: int
+    ideaBoard_id: int
+    answer: Any
+
 class AnswerResponse(BaseModel):
     message: str
     step: int
@@ -0,0 +1,171 @@
+"""
+Writing questionnaire answers.
+
+`answers` rows hold only the latest value of each answer; every submission
+is also appended to `answer_revisions`, so a save costs the same however
+long the history is. `compact_revisions` folds revisions older than the
+retention window (see compact_answer_revisions.py).
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import DateTime, func, insert as sql_insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models import Answer, AnswerRevision
+
+ANSWER_REVISION_RETENTION_DAYS = int(os.getenv("ANSWER_REVISION_RETENTION_DAYS", 90))
+
+
+class AnswerService:
+    """Writes of an idea's answers and their revision history"""
+
+    @staticmethod
+    def save_answer(db: Session, question_id: int, idea_id: int, user_id: int, answer_data: Any) -> Answer:
+        """Set one answer to `answer_data` and log the revision (the caller commits)"""
+        now = datetime.utcnow()
+        answer = db.query(Answer).filter(
+            Answer.question_id == question_id,
+            Answer.ideaBoard_id == idea_id,
+            Answer.user_id == user_id
+        ).first()
+        if answer:
+            answer.answer = answer_data
+            answer.updated_at = now
+        else:
+            answer = Answer(
+                question_id=question_id,
+                ideaBoard_id=idea_id,
+                user_id=user_id,
+                answer=answer_data,
+                created_at=now,
+                updated_at=now
+            )
+            db.add(answer)
+            db.flush()  # assigns answer.id for the revision
+        db.add(AnswerRevision(answer_id=answer.id, user_id=user_id, answer=answer_data, created_at=now))
+        return answer
+
+    @staticmethod
+    def upsert_answers(db: Session, idea_id: int, user_id: int, answers: Dict[int, Any]) -> None:
+        """Insert or update the answers (question id -> answer data) of one idea.
+
+        Relies on the unique key on (question_id, ideaBoard_id, user_id): on
+        MySQL, PostgreSQL and SQLite this is a single INSERT ... ON DUPLICATE
+        KEY UPDATE / ON CONFLICT statement. The caller commits.
+        """
+        if not answers:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {
+                "question_id": question_id,
+                "ideaBoard_id": idea_id,
+                "user_id": user_id,
+                "answer": answer_data,
+                "created_at": now,
+                "updated_at": now
+            }
+            for question_id, answer_data in answers.items()
+        ]
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(Answer).values(rows)
+            stmt = stmt.on_duplicate_key_update(
+                answer=stmt.inserted.answer,
+                updated_at=stmt.inserted.updated_at
+            )
+            db.execute(stmt)
+        elif dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(Answer).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["question_id", "ideaBoard_id", "user_id"],
+                set_={"answer": stmt.excluded.answer, "updated_at": stmt.excluded.updated_at}
+            )
+            db.execute(stmt)
+        else:
+            AnswerService._upsert_answers_orm(db, idea_id, user_id, rows, now)
+            db.flush()
+        AnswerService._log_revisions(db, idea_id, user_id, list(answers.keys()), now)
+
+    @staticmethod
+    def _log_revisions(db: Session, idea_id: int, user_id: int, question_ids: List[int], now: datetime) -> None:
+        """Append the just-written values of these answers to their history in one statement"""
+        db.execute(
+            sql_insert(AnswerRevision).from_select(
+                ["answer_id", "user_id", "answer", "created_at"],
+                select(Answer.id, Answer.user_id, Answer.answer, literal(now, DateTime)).where(
+                    Answer.ideaBoard_id == idea_id,
+                    Answer.user_id == user_id,
+                    Answer.question_id.in_(question_ids)
+                )
+            )
+        )
+
+    @staticmethod
+    def _upsert_answers_orm(db: Session, idea_id: int, user_id: int, rows: list, now: datetime) -> None:
+        """Fallback for other databases: one query for existing rows, then a batched flush"""
+        existing = {
+            answer.question_id: answer
+            for answer in db.query(Answer).filter(
+                Answer.ideaBoard_id == idea_id,
+                Answer.user_id == user_id,
+                Answer.question_id.in_([row["question_id"] for row in rows])
+            )
+        }
+        for row in rows:
+            answer = existing.get(row["question_id"])
+            if answer:
+                answer.answer = row["answer"]
+                answer.updated_at = now
+            else:
+                db.add(Answer(**row))
+
+    @staticmethod
+    def compact_revisions(
+        db: Session,
+        retention_days: int = ANSWER_REVISION_RETENTION_DAYS,
+        batch_size: int = 500,
+        dry_run: bool = False
+    ) -> int:
+        """Fold revisions older than `retention_days` into one per answer.
+
+        Of each answer's revisions before the cutoff only the newest (the
+        value as of the cutoff) is kept; newer revisions are untouched.
+        Commits after every batch of answers and returns the number of
+        revisions deleted (or that would be, with `dry_run`).
+        """
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        deleted = 0
+        last_answer_id = 0
+        while True:
+            groups = db.query(
+                AnswerRevision.answer_id,
+                func.max(AnswerRevision.id),
+                func.count(AnswerRevision.id)
+            ).filter(
+                AnswerRevision.created_at < cutoff,
+                AnswerRevision.answer_id > last_answer_id
+            ).group_by(AnswerRevision.answer_id).having(
+                func.count(AnswerRevision.id) > 1
+            ).order_by(AnswerRevision.answer_id).limit(batch_size).all()
+            if not groups:
+                break
+            last_answer_id = groups[-1][0]
+            if dry_run:
+                deleted += sum(count - 1 for _, _, count in groups)
+                continue
+            deleted += db.query(AnswerRevision).filter(
+                AnswerRevision.answer_id.in_([answer_id for answer_id, _, _ in groups]),
+                AnswerRevision.created_at < cutoff,
+                AnswerRevision.id.notin_([keep_id for _, keep_id, _ in groups])
+            ).delete(synchronize_session=False)
+            db.commit()
+        return deleted
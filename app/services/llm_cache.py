@@ -0,0 +1,167 @@
+"""
+Content-addressed cache for LLM responses.
+
+Responses are keyed by a SHA-256 hash of the normalized request payload
+(model, temperature and prompt messages), so identical section inputs are
+only ever sent to the model once per TTL. Entries live in an in-process LRU
+and, optionally, in the `llm_response_cache` table so they survive restarts
+and are shared between workers.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.models import LLMCacheEntry
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1000))
+LLM_CACHE_DB_ENABLED = os.getenv("LLM_CACHE_DB_ENABLED", "false").lower() == "true"
+# Expired rows are purged from the DB table once every this many writes
+LLM_CACHE_DB_PURGE_EVERY = int(os.getenv("LLM_CACHE_DB_PURGE_EVERY", 100))
+
+
+def make_cache_key(payload: Dict[str, Any]) -> str:
+    """Build a stable hash for an OpenAI-style chat completion payload"""
+    normalized = {
+        "model": payload.get("model"),
+        "temperature": payload.get("temperature"),
+        "messages": [
+            {
+                "role": message.get("role"),
+                # Ignore trailing whitespace differences on each line of the prompt
+                "content": "\n".join(line.rstrip() for line in str(message.get("content", "")).strip().splitlines())
+            }
+            for message in payload.get("messages", [])
+        ]
+    }
+    serialized = json.dumps(normalized, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """In-process LRU with TTL, optionally backed by a database table"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int, use_db: bool = False):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_db = use_db
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: Dict[str, Any], ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_db(self, key: str) -> Optional[tuple]:
+        db = SessionLocal()
+        try:
+            entry = db.query(LLMCacheEntry).filter(
+                LLMCacheEntry.cache_key == key,
+                LLMCacheEntry.expires_at > datetime.utcnow()
+            ).first()
+            if not entry:
+                return None
+            return entry.response, (entry.expires_at - datetime.utcnow()).total_seconds()
+        finally:
+            db.close()
+
+    def _set_db(self, key: str, value: Dict[str, Any], model: Optional[str]) -> None:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=self.ttl_seconds)
+            entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.cache_key == key).first()
+            if entry:
+                entry.response = value
+                entry.model = model
+                entry.created_at = now
+                entry.expires_at = expires_at
+            else:
+                db.add(LLMCacheEntry(
+                    cache_key=key,
+                    model=model,
+                    response=value,
+                    created_at=now,
+                    expires_at=expires_at
+                ))
+            self._db_writes += 1
+            if self._db_writes % LLM_CACHE_DB_PURGE_EVERY == 0:
+                db.query(LLMCacheEntry).filter(LLMCacheEntry.expires_at <= now).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            # Another worker may have stored the same key concurrently; the cache is best-effort
+            db.rollback()
+            print(f"[LLM Cache] Could not store entry in database: {e}")
+        finally:
+            db.close()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response for `key`, or None"""
+        value = self._get_local(key)
+        if value is None and self.use_db:
+            try:
+                found = await run_in_threadpool(self._get_db, key)
+            except Exception as e:
+                print(f"[LLM Cache] Database lookup failed: {e}")
+                found = None
+            if found is not None:
+                value, remaining_ttl = found
+                self._set_local(key, value, remaining_ttl)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Dict[str, Any], model: Optional[str] = None) -> None:
+        """Store a response under `key` in the LRU and, if enabled, the database"""
+        value = copy.deepcopy(value)
+        self._set_local(key, value)
+        if self.use_db:
+            await run_in_threadpool(self._set_db, key, value, model)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "db_enabled": self.use_db
+        }
+
+
+llm_cache = LLMResponseCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS, LLM_CACHE_DB_ENABLED)
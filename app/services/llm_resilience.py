@@ -0,0 +1,261 @@
+"""
+Retries, circuit breaking and rate limiting for LLM API calls.
+
+`llm_resilience.call(send)` runs one request attempt (`send` is an async
+callable that raises on failure) through:
+
+- a token bucket sized to the provider quota (LLM_RATE_LIMIT_PER_MINUTE,
+  bursts of up to LLM_RATE_LIMIT_BURST); callers wait for a token instead
+  of overrunning the quota. The bucket is per process, so with several
+  workers divide the quota between them;
+- a circuit breaker that opens after LLM_CIRCUIT_FAILURE_THRESHOLD
+  consecutive server-side failures and fails fast with CircuitOpenError for
+  LLM_CIRCUIT_RESET_SECONDS, then lets one trial request through;
+- retries with jittered exponential backoff, per error class (rate limited,
+  server error, timeout, connection error). A Retry-After header is honored
+  when the server sends one. Other client errors (4xx) are not retried.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, TypeVar
+
+import httpx
+
+LLM_RATE_LIMIT_PER_MINUTE = float(os.getenv("LLM_RATE_LIMIT_PER_MINUTE", 60))
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", 10))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", 5))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", 30))
+LLM_RETRY_BASE_DELAY_SECONDS = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", 1.0))
+LLM_RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", 20.0))
+# A Retry-After longer than this is not waited out; the request fails instead
+LLM_RETRY_AFTER_MAX_SECONDS = float(os.getenv("LLM_RETRY_AFTER_MAX_SECONDS", 60.0))
+
+T = TypeVar("T")
+
+
+class RetryPolicy(NamedTuple):
+    max_attempts: int
+    base_delay: float
+    # Whether failures of this class count towards opening the circuit
+    trips_circuit: bool
+
+
+# Error class -> policy; errors that are not classified are never retried
+RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    "rate_limited": RetryPolicy(int(os.getenv("LLM_RETRY_RATE_LIMITED_ATTEMPTS", 4)), LLM_RETRY_BASE_DELAY_SECONDS * 2, False),
+    "server_error": RetryPolicy(int(os.getenv("LLM_RETRY_SERVER_ERROR_ATTEMPTS", 3)), LLM_RETRY_BASE_DELAY_SECONDS, True),
+    "timeout": RetryPolicy(int(os.getenv("LLM_RETRY_TIMEOUT_ATTEMPTS", 2)), LLM_RETRY_BASE_DELAY_SECONDS, True),
+    "connection": RetryPolicy(int(os.getenv("LLM_RETRY_CONNECTION_ATTEMPTS", 3)), LLM_RETRY_BASE_DELAY_SECONDS, True),
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM backend while the circuit is open"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"LLM circuit open; retrying in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def classify_error(exc: Exception) -> Optional[str]:
+    """Error class of a failed attempt, or None if it should not be retried"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        if status == 429:
+            return "rate_limited"
+        if status in (500, 502, 503, 504):
+            return "server_error"
+        return None
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.TransportError):
+        return "connection"
+    return None
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Delay requested by the server's Retry-After header (seconds or HTTP date)"""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    value = exc.response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_seconds(attempt: int, base_delay: float) -> float:
+    """Full-jitter exponential backoff before retry number `attempt`"""
+    ceiling = min(LLM_RETRY_MAX_DELAY_SECONDS, base_delay * (2 ** max(0, attempt - 1)))
+    return random.uniform(0, ceiling)
+
+
+class TokenBucket:
+    """Requests-per-minute limiter; callers wait until a token is available"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token (possibly in advance) and return how long to wait for it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "rate_per_minute": self.rate * 60,
+            "burst": self.capacity,
+            "tokens": round(self.tokens, 2)
+        }
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open trial -> closed"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            retry_in = self.opened_at + self.reset_seconds - time.monotonic()
+            if self.state == "open" and retry_in <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(max(0.0, retry_in))
+
+    def release_trial(self) -> None:
+        """Free the half-open trial slot of a request that ended without an answer"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                print("[LLM Resilience] ✅ Circuit closed, backend is responding again")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, trips_circuit: bool) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+            if not trips_circuit:
+                if self.state == "half_open":
+                    # The backend answered (e.g. 429), so it is up; let the next request try again
+                    self.state = "closed"
+                return
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    print(f"[LLM Resilience] ⚠️ Circuit opened after {self.consecutive_failures} consecutive failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened
+        }
+
+
+class LLMResilience:
+    """Rate limiter, circuit breaker and retry loop shared by all LLM calls"""
+
+    def __init__(self, bucket: TokenBucket, breaker: CircuitBreaker):
+        self.bucket = bucket
+        self.breaker = breaker
+        self.retries = 0
+        self.failures = 0
+
+    async def call(self, send: Callable[[], Awaitable[T]], description: str = "LLM request") -> T:
+        """Run `send` with retries; re-raises the last error when retries are exhausted"""
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_request()
+            await self.bucket.acquire()
+            try:
+                result = await send()
+            except asyncio.CancelledError:
+                self.breaker.release_trial()
+                raise
+            except Exception as exc:
+                error_class = classify_error(exc)
+                if error_class is None:
+                    if isinstance(exc, httpx.HTTPStatusError):
+                        # A client error means the backend is up; do not count it against the circuit
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.release_trial()
+                    raise
+                policy = RETRY_POLICIES[error_class]
+                self.breaker.record_failure(policy.trips_circuit)
+                delay = retry_after_seconds(exc)
+                if delay is None:
+                    delay = backoff_seconds(attempt, policy.base_delay)
+                if attempt >= policy.max_attempts or delay > LLM_RETRY_AFTER_MAX_SECONDS:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                print(f"[LLM Resilience] {description}: {error_class} on attempt {attempt}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.snapshot(),
+            "rate_limit": self.bucket.snapshot(),
+            "retries": self.retries,
+            "failures": self.failures
+        }
+
+
+llm_resilience = LLMResilience(
+    TokenBucket(LLM_RATE_LIMIT_PER_MINUTE, LLM_RATE_LIMIT_BURST),
+    CircuitBreaker(LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS)
+)
@@ -1,9 +1,13 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, List, Optional, Tuple
 import httpx  # Import httpx
 from datetime import datetime
+import asyncio
 import os
 import json
 from dotenv import load_dotenv
+from app.services.llm_cache import llm_cache, make_cache_key, LLM_CACHE_ENABLED
+from app.services.llm_stream import IncrementalJSONExtractor, parse_sse_line
+from app.services.llm_resilience import llm_resilience, CircuitOpenError
 
 # Robust .env loading
 possible_env_paths = [
@@ -28,9 +32,74 @@ VULTR_API_BASE_URL = "https://api.vultrinference.com/v1"
 VULTR_CHAT_MODEL = "deepseek-r1-distill-llama-70b"
 # print(f"[LLM Service] Vultr API Key found: {'Yes' if VULTR_API_KEY else 'No'}")
 
+# Shared HTTP client settings for the Vultr backend
+VULTR_HTTP_TIMEOUT = float(os.getenv("VULTR_HTTP_TIMEOUT", 60.0)) # Read/write timeout for potentially long LLM responses
+VULTR_HTTP_CONNECT_TIMEOUT = float(os.getenv("VULTR_HTTP_CONNECT_TIMEOUT", 10.0))
+VULTR_HTTP_MAX_CONNECTIONS = int(os.getenv("VULTR_HTTP_MAX_CONNECTIONS", 20))
+VULTR_HTTP_MAX_KEEPALIVE = int(os.getenv("VULTR_HTTP_MAX_KEEPALIVE", 10))
+VULTR_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("VULTR_HTTP_KEEPALIVE_EXPIRY", 30.0))
+VULTR_HTTP2 = os.getenv("VULTR_HTTP2", "true").lower() == "true" # Only used if the 'h2' package is installed
+# Stream completions (`stream: true`) and stop reading as soon as the JSON answer is complete
+LLM_STREAMING_ENABLED = os.getenv("LLM_STREAMING_ENABLED", "false").lower() == "true"
+# Minimum growth (in characters) of a partial insight/overview before it is forwarded again
+LLM_STREAM_PARTIAL_MIN_CHARS = int(os.getenv("LLM_STREAM_PARTIAL_MIN_CHARS", 40))
+
+SECTION_ANALYSIS_KEYS = ("insight", "recommendations", "score", "reasoning")
+STRATEGIC_OVERVIEW_KEYS = ("overview", "strategic_next_steps", "key_strengths", "key_challenges")
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401 - installed via httpx[http2]
+        return True
+    except ImportError:
+        return False
+
 class LLMService:
     @staticmethod
-    async def _make_vultr_request(payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def startup() -> None:
+        """Create the shared HTTP client (called on FastAPI startup)"""
+        LLMService._get_http_client()
+
+    @staticmethod
+    async def shutdown() -> None:
+        """Close the shared HTTP client (called on FastAPI shutdown)"""
+        global _http_client, _http_client_loop
+        if _http_client is not None:
+            await _http_client.aclose()
+        _http_client = None
+        _http_client_loop = None
+
+    @staticmethod
+    def _get_http_client() -> httpx.AsyncClient:
+        """Return the application-lifetime client, creating it on first use.
+
+        Pooled connections belong to the event loop that opened them, so a new
+        client is created if we are now running on a different loop (e.g. a
+        script calling asyncio.run more than once).
+        """
+        global _http_client, _http_client_loop
+        loop = asyncio.get_running_loop()
+        if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+            use_http2 = VULTR_HTTP2 and _http2_available()
+            _http_client = httpx.AsyncClient(
+                base_url=VULTR_API_BASE_URL,
+                http2=use_http2,
+                limits=httpx.Limits(
+                    max_connections=VULTR_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=VULTR_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=VULTR_HTTP_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(VULTR_HTTP_TIMEOUT, connect=VULTR_HTTP_CONNECT_TIMEOUT)
+            )
+            _http_client_loop = loop
+            print(f"[LLM Service - Vultr] Created shared HTTP client (http2={'on' if use_http2 else 'off'}, max_connections={VULTR_HTTP_MAX_CONNECTIONS}).")
+        return _http_client
+
+    @staticmethod
+    async def _make_vultr_request(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
         """Helper method to make requests to Vultr API"""
         if not VULTR_API_KEY:
             print("[LLM Service - Vultr] CRITICAL ERROR: VULTR_API_KEY not found.")
@@ -45,68 +114,177 @@ class LLMService:
                 "strategic_next_steps": ["Please configure VULTR_API_KEY in .env"], # For strategic_overview fallback
                 "key_strengths": [], # For strategic_overview fallback
                 "key_challenges": [] # For strategic_overview fallback
-            }
+            }, 0
 
         headers = {
             "Authorization": f"Bearer {VULTR_API_KEY}",
             "Content-Type": "application/json"
         }
-        async with httpx.AsyncClient() as client:
+        client = LLMService._get_http_client()
+
+        async def send() -> httpx.Response:
+            response = await client.post(
+                "/chat/completions",
+                json=payload,
+                headers=headers
+            )
+            response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
+            return response
+
+        try:
+            # Rate limited, retried on 429/5xx/timeouts, and short-circuited while the backend is down
+            response = await llm_resilience.call(send, "Vultr chat completion")
+            result = response.json()
+            token_usage = result.get("usage", {}).get("total_tokens", 0)
+            return result, token_usage
+        except CircuitOpenError as e:
+            print(f"[LLM Service - Vultr] Skipping request: {e}")
+            return LLMService._circuit_open_response(e), 0
+        except httpx.HTTPStatusError as e:
+            print(f"[LLM Service - Vultr] HTTP error: {e.response.status_code} - {e.response.text}")
+            return LLMService._http_error_response(e), 0
+        except httpx.RequestError as e:
+            print(f"[LLM Service - Vultr] Request error: {e}")
+            return LLMService._request_error_response(e), 0
+
+    @staticmethod
+    def _http_error_response(e: httpx.HTTPStatusError) -> Dict[str, Any]:
+        # Try to parse error response from Vultr if available
+        try:
+            error_details = e.response.json()
+        except json.JSONDecodeError:
+            error_details = e.response.text
+        return {
+            "error": "Vultr API HTTP error",
+            "status_code": e.response.status_code,
+            "details": error_details,
+            # Fallback fields for direct use by calling methods
+            "insight": f"Vultr API HTTP error {e.response.status_code}.",
+            "recommendations": ["Check Vultr API status and your request."],
+            "score": 0,
+            "reasoning": f"HTTP {e.response.status_code}",
+            "overview": f"Vultr API HTTP error {e.response.status_code}.",
+            "strategic_next_steps": ["Check Vultr API status and your request."],
+            "key_strengths": [],
+            "key_challenges": []
+        }
+
+    @staticmethod
+    def _circuit_open_response(e: CircuitOpenError) -> Dict[str, Any]:
+        return {
+            "error": "Vultr API unavailable",
+            "details": str(e),
+            "insight": "Vultr API is temporarily unavailable.",
+            "recommendations": ["Try again in a few minutes."],
+            "score": 0,
+            "reasoning": "Circuit open",
+            "overview": "Vultr API is temporarily unavailable.",
+            "strategic_next_steps": ["Try again in a few minutes."],
+            "key_strengths": [],
+            "key_challenges": []
+        }
+
+    @staticmethod
+    def _request_error_response(e: httpx.RequestError) -> Dict[str, Any]:
+        return {
+            "error": "Vultr API Request error",
+            "details": str(e),
+            "insight": "Vultr API request error.",
+            "recommendations": ["Check network or Vultr service status."],
+            "score": 0,
+            "reasoning": "Request Error",
+            "overview": "Vultr API request error.",
+            "strategic_next_steps": ["Check network or Vultr service status."],
+            "key_strengths": [],
+            "key_challenges": []
+        }
+
+    @staticmethod
+    async def _stream_vultr_request(
+        payload: Dict[str, Any],
+        required_keys: Tuple[str, ...],
+        partial_key: Optional[str] = None,
+        on_partial: Optional[Callable[[str], None]] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """Streaming variant of `_make_vultr_request`.
+
+        Reads the completion as it is generated and stops as soon as a JSON
+        object with `required_keys` is complete, skipping the model's
+        <think> preamble. `on_partial` receives the text of `partial_key`
+        so far while the object is still being written. Returns the same
+        (response, token_usage) shape, with the JSON object as the content.
+        """
+        if not VULTR_API_KEY:
+            return await LLMService._make_vultr_request(payload)
+
+        headers = {
+            "Authorization": f"Bearer {VULTR_API_KEY}",
+            "Content-Type": "application/json"
+        }
+        extractor = IncrementalJSONExtractor(required_keys, partial_key if on_partial else None)
+        token_usage = 0
+        forwarded = 0
+        client = LLMService._get_http_client()
+
+        async def open_stream() -> httpx.Response:
+            request = client.build_request("POST", "/chat/completions", json={**payload, "stream": True}, headers=headers)
+            response = await client.send(request, stream=True)
+            if response.is_error:
+                await response.aread()  # so the error body can be logged
+                await response.aclose()
+                response.raise_for_status()
+            return response
+
+        try:
+            # Only opening the stream is retried; an error mid-stream falls back like any other
+            response = await llm_resilience.call(open_stream, "Vultr chat completion (streaming)")
             try:
-                response = await client.post(
-                    f"{VULTR_API_BASE_URL}/chat/completions",
-                    json=payload,
-                    headers=headers,
-                    timeout=60.0 # Increased timeout for potentially longer LLM responses
-                )
-                response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
-                result = response.json()
-                token_usage = result.get("usage", {}).get("total_tokens", 0)
-                return result, token_usage
-            except httpx.HTTPStatusError as e:
-                print(f"[LLM Service - Vultr] HTTP error: {e.response.status_code} - {e.response.text}")
-                # Try to parse error response from Vultr if available
-                try:
-                    error_details = e.response.json()
-                except json.JSONDecodeError:
-                    error_details = e.response.text
-                return {
-                    "error": "Vultr API HTTP error",
-                    "status_code": e.response.status_code,
-                    "details": error_details,
-                    # Fallback fields for direct use by calling methods
-                    "insight": f"Vultr API HTTP error {e.response.status_code}.",
-                    "recommendations": ["Check Vultr API status and your request."],
-                    "score": 0,
-                    "reasoning": f"HTTP {e.response.status_code}",
-                    "overview": f"Vultr API HTTP error {e.response.status_code}.",
-                    "strategic_next_steps": ["Check Vultr API status and your request."],
-                    "key_strengths": [],
-                    "key_challenges": []
-                }
-            except httpx.RequestError as e:
-                print(f"[LLM Service - Vultr] Request error: {e}")
-                return {
-                     "error": "Vultr API Request error",
-                     "details": str(e),
-                    "insight": "Vultr API request error.",
-                    "recommendations": ["Check network or Vultr service status."],
-                    "score": 0,
-                    "reasoning": "Request Error",
-                    "overview": "Vultr API request error.",
-                    "strategic_next_steps": ["Check network or Vultr service status."],
-                    "key_strengths": [],
-                    "key_challenges": []
-                }
+                async for line in response.aiter_lines():
+                    chunk = parse_sse_line(line)
+                    if not chunk:
+                        continue
+                    token_usage = (chunk.get("usage") or {}).get("total_tokens", token_usage)
+                    delta = (chunk.get("choices") or [{}])[0].get("delta") or {}
+                    if not delta.get("content"):
+                        continue
+                    if extractor.feed(delta["content"]):
+                        break  # the JSON answer is complete
+                    if on_partial:
+                        partial = extractor.partial_value()
+                        if partial and len(partial) - forwarded >= LLM_STREAM_PARTIAL_MIN_CHARS:
+                            forwarded = len(partial)
+                            on_partial(partial)
+            finally:
+                # Leaving early closes the stream; the rest of the completion is not needed
+                await response.aclose()
+        except CircuitOpenError as e:
+            print(f"[LLM Service - Vultr] Skipping request: {e}")
+            return LLMService._circuit_open_response(e), 0
+        except httpx.HTTPStatusError as e:
+            print(f"[LLM Service - Vultr] HTTP error (streaming): {e.response.status_code} - {e.response.text}")
+            return LLMService._http_error_response(e), 0
+        except httpx.RequestError as e:
+            print(f"[LLM Service - Vultr] Request error (streaming): {e}")
+            return LLMService._request_error_response(e), 0
+
+        if extractor.done and on_partial and partial_key:
+            on_partial(str(extractor.result.get(partial_key, "")))
+        content = extractor.result_text if extractor.done else extractor.text
+        return {
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {"total_tokens": token_usage}
+        }, token_usage
 
 
     @staticmethod
     async def generate_section_analysis(
         section_name: str,
         answers: List[Dict[str, Any]], # Expecting answers in format {"type": "...", "value": ...}
-        question_texts: List[str],
+        question_texts: List[str],  # The question of each answer, in the same order
         max_section_score: int = 9, # Default to 9, can be 10 for the last section
-        linked_personas: List[Any] = None  # Add optional personas parameter
+        linked_personas: List[Any] = None,  # Add optional personas parameter
+        on_partial_insight: Optional[Callable[[str], None]] = None,  # Streaming mode only
+        use_cache: bool = True  # False skips the cached analysis (the fresh one is still cached)
     ) -> Dict[str, Any]:
         """Generate analysis for a specific section using Vultr"""
         
@@ -168,9 +346,23 @@ Example JSON (if max_section_score was 9):
             # The strictness of the system prompt is key here.
         }
 
+        # Identical prompts (same section, questions, answers, max score and personas) reuse the cached analysis
+        cache_key = make_cache_key(vultr_payload) if LLM_CACHE_ENABLED else None
+        if cache_key and use_cache:
+            cached_analysis = await llm_cache.get(cache_key)
+            if cached_analysis is not None:
+                print(f"[LLM Service - Vultr] Cache hit for section '{section_name}'.")
+                return cached_analysis
+
+        token_usage = 0
         try:
             print(f"[LLM Service - Vultr] Sending request for section '{section_name}' to {VULTR_CHAT_MODEL}...")
-            api_response, token_usage = await LLMService._make_vultr_request(vultr_payload)
+            if LLM_STREAMING_ENABLED:
+                api_response, token_usage = await LLMService._stream_vultr_request(
+                    vultr_payload, SECTION_ANALYSIS_KEYS, "insight", on_partial_insight
+                )
+            else:
+                api_response, token_usage = await LLMService._make_vultr_request(vultr_payload)
             
             if "error" in api_response: # Check if helper returned an error structure
                 print(f"[LLM Service - Vultr] Error in section analysis for '{section_name}': {api_response.get('details', api_response.get('error'))}")
@@ -179,7 +371,8 @@ Example JSON (if max_section_score was 9):
                     "recommendations": api_response.get("recommendations", ["Try again later."]),
                     "score": api_response.get("score", 0),
                     "reasoning": api_response.get("reasoning", "Error in Vultr API call."),
-                    "token_usage": token_usage
+                    "token_usage": token_usage,
+                    "is_fallback": True
                 }
 
             print(f"[LLM Service - Vultr] Received response from {VULTR_CHAT_MODEL} for section '{section_name}'.")
@@ -197,9 +390,11 @@ Example JSON (if max_section_score was 9):
                         json_substring = response_content_str[json_start_index : json_end_index + 1]
                         # print(f"[LLM Service - Vultr] Extracted JSON substring: {json_substring}") # For debugging
                         analysis = json.loads(json_substring)
-                        required_keys = {"insight", "recommendations", "score", "reasoning"}
+                        required_keys = set(SECTION_ANALYSIS_KEYS)
                         if not required_keys.issubset(analysis.keys()):
                             raise ValueError(f"Missing one or more required keys in LLM JSON response. Got: {analysis.keys()}. Original response: {response_content_str}")
+                        if cache_key:
+                            await llm_cache.set(cache_key, analysis, VULTR_CHAT_MODEL)
                         return analysis
                     else:
                         raise ValueError(f"Could not find a valid JSON structure ({{...}}) in the LLM response. Response: '{response_content_str}'")
@@ -216,14 +411,16 @@ Example JSON (if max_section_score was 9):
                 "recommendations": ["Try again later.", "Review service logs."],
                 "score": 0,
                 "reasoning": "Error in Vultr analysis processing.",
-                "token_usage": token_usage
+                "token_usage": token_usage,
+                "is_fallback": True
             }
 
     @staticmethod
     async def generate_strategic_overview(
         idea_name: str,
         all_sections_analysis: List[Dict[str, Any]],
-        linked_personas: List[Any] = None  # Add optional personas parameter
+        linked_personas: List[Any] = None,  # Add optional personas parameter
+        on_partial_overview: Optional[Callable[[str], None]] = None  # Streaming mode only
     ) -> Dict[str, Any]:
         """Generate overall strategic analysis using Vultr"""
         
@@ -268,9 +465,15 @@ Example JSON (if max_section_score was 9):
             "temperature": 0.7,
         }
 
+        token_usage = 0
         try:
             print(f"[LLM Service - Vultr] Sending strategic overview request for '{idea_name}' to {VULTR_CHAT_MODEL}...")
-            api_response, token_usage = await LLMService._make_vultr_request(vultr_payload)
+            if LLM_STREAMING_ENABLED:
+                api_response, token_usage = await LLMService._stream_vultr_request(
+                    vultr_payload, STRATEGIC_OVERVIEW_KEYS, "overview", on_partial_overview
+                )
+            else:
+                api_response, token_usage = await LLMService._make_vultr_request(vultr_payload)
 
             if "error" in api_response: # Check if helper returned an error structure
                 print(f"[LLM Service - Vultr] Error in strategic overview for '{idea_name}': {api_response.get('details', api_response.get('error'))}")
@@ -279,7 +482,8 @@ Example JSON (if max_section_score was 9):
                     "strategic_next_steps": api_response.get("strategic_next_steps", ["Try again later."]),
                     "key_strengths": api_response.get("key_strengths", []),
                     "key_challenges": api_response.get("key_challenges", []),
-                    "token_usage": token_usage
+                    "token_usage": token_usage,
+                    "is_fallback": True
                 }
 
             print(f"[LLM Service - Vultr] Received strategic overview response from {VULTR_CHAT_MODEL}.")
@@ -296,7 +500,7 @@ Example JSON (if max_section_score was 9):
                         json_substring = response_content_str[json_start_index : json_end_index + 1]
                         # print(f"[LLM Service - Vultr] Extracted JSON substring for overview: {json_substring}") # For debugging
                         strategic_analysis = json.loads(json_substring)
-                        required_keys = {"overview", "strategic_next_steps", "key_strengths", "key_challenges"}
+                        required_keys = set(STRATEGIC_OVERVIEW_KEYS)
                         if not required_keys.issubset(strategic_analysis.keys()):
                             raise ValueError(f"Missing one or more required keys in LLM JSON response for overview. Got: {strategic_analysis.keys()}. Original response: {response_content_str}")
                         return strategic_analysis
@@ -315,5 +519,6 @@ Example JSON (if max_section_score was 9):
                 "strategic_next_steps": ["Try again later.", "Review service logs."],
                 "key_strengths": [],
                 "key_challenges": [],
-                "token_usage": token_usage
+                "token_usage": token_usage,
+                "is_fallback": True
             }
@@ -0,0 +1,165 @@
+"""
+Incremental parsing of streamed LLM completions.
+
+deepseek-r1 writes a long `<think>...</think>` reasoning preamble before the
+JSON object we asked for. `IncrementalJSONExtractor` is fed the streamed text
+chunk by chunk, skips reasoning blocks, and reports the first complete
+top-level JSON object (with the required keys) as soon as its closing brace
+arrives, so the caller can stop reading the stream. While the object is
+still open it can also expose the text of one string field so far (e.g. the
+section "insight") for progress updates.
+"""
+import json
+from typing import Any, Dict, Iterable, Optional
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+def _decode_partial_string(raw: str) -> str:
+    """Decode the body of a JSON string that may end mid escape sequence"""
+    # An escape is at most 6 characters (\uXXXX); drop an unfinished one at the end
+    for trim in range(0, min(len(raw), 6) + 1):
+        try:
+            return json.loads(f'"{raw[:len(raw) - trim]}"')
+        except ValueError:
+            continue
+    return ""
+
+
+class IncrementalJSONExtractor:
+    """Find the first complete JSON object in text that arrives in chunks"""
+
+    def __init__(self, required_keys: Iterable[str] = (), partial_key: Optional[str] = None):
+        self.required_keys = set(required_keys)
+        self.partial_key = partial_key
+        self.text = ""
+        self.result: Optional[Dict[str, Any]] = None
+        self.result_text: Optional[str] = None
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._expect_key = False
+        self._last_key: Optional[str] = None
+        self._partial_start: Optional[int] = None
+        self._partial_end: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Add streamed text; returns True once the object is complete"""
+        if self.done:
+            return True
+        self.text += chunk
+        self._scan()
+        return self.done
+
+    def partial_value(self) -> Optional[str]:
+        """Text of `partial_key`'s string value received so far, if it has started"""
+        if self._partial_start is None:
+            return None
+        end = self._partial_end if self._partial_end is not None else len(self.text)
+        return _decode_partial_string(self.text[self._partial_start:end])
+
+    def _reset_object(self) -> None:
+        self._start = None
+        self._depth = 0
+        self._last_key = None
+        self._partial_start = None
+        self._partial_end = None
+
+    def _scan(self) -> None:
+        text = self.text
+        while self._pos < len(text):
+            pos = self._pos
+            ch = text[pos]
+
+            if self._depth == 0:
+                if ch == "<":
+                    if text.startswith(THINK_OPEN, pos):
+                        end = text.find(THINK_CLOSE, pos)
+                        if end == -1:
+                            return  # still reasoning; wait for the closing tag
+                        self._pos = end + len(THINK_CLOSE)
+                        continue
+                    if THINK_OPEN.startswith(text[pos:]):
+                        return  # possibly a split "<think>" tag
+                elif ch == "{":
+                    self._start = pos
+                    self._depth = 1
+                    self._expect_key = True
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._close_string(pos)
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = pos + 1
+                self._string_is_key = self._depth == 1 and self._expect_key
+                if (
+                    self._depth == 1 and not self._string_is_key
+                    and self.partial_key is not None and self._last_key == self.partial_key
+                ):
+                    self._partial_start = pos + 1
+                    self._partial_end = None
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = pos + 1
+                    if self._try_complete(text[self._start:pos + 1]):
+                        return
+                    self._reset_object()
+                    continue
+            elif self._depth == 1:
+                if ch == ",":
+                    self._expect_key = True
+                elif ch == ":":
+                    self._expect_key = False
+            self._pos += 1
+
+    def _close_string(self, pos: int) -> None:
+        if self._depth != 1:
+            return
+        if self._string_is_key:
+            self._last_key = _decode_partial_string(self.text[self._string_start:pos])
+        elif self._partial_start == self._string_start:
+            self._partial_end = pos
+
+    def _try_complete(self, candidate: str) -> bool:
+        try:
+            parsed = json.loads(candidate)
+        except ValueError:
+            return False
+        if not isinstance(parsed, dict) or not self.required_keys.issubset(parsed.keys()):
+            return False
+        self.result = parsed
+        self.result_text = candidate
+        return True
+
+
+def parse_sse_line(line: str) -> Optional[Dict[str, Any]]:
+    """Parse one `data: {...}` line of an OpenAI-compatible stream (None for others)"""
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
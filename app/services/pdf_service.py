@@ -1,20 +1,277 @@
+import asyncio
+import io
+import multiprocessing
 import os
 import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 
-async def generate_report_pdf(report_data, idea_name):
-    """Generate a PDF report from the report data"""
-    # Create a temporary file
-    temp_dir = tempfile.gettempdir()
-    output_path = os.path.join(temp_dir, f"{idea_name.replace(' ', '_')}_Report.pdf")
-    
+# ReportLab rendering is CPU-bound, so it runs in worker processes instead of on the event loop
+PDF_RENDER_PROCESSES = int(os.getenv("PDF_RENDER_PROCESSES", 2))
+# "memory" renders into a buffer and keeps recent PDFs in an in-process LRU;
+# "disk" keeps rendered PDFs in PDF_CACHE_DIR instead
+PDF_OUTPUT_MODE = os.getenv("PDF_OUTPUT_MODE", "memory").lower()
+# PDFs larger than this are handed back as a temp file rather than in memory (and are not cached)
+PDF_SPOOL_THRESHOLD_BYTES = int(os.getenv("PDF_SPOOL_THRESHOLD_BYTES", 10 * 1024 * 1024))
+PDF_MEMORY_CACHE_MAX_BYTES = int(os.getenv("PDF_MEMORY_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+# Rendered PDFs are kept on disk (disk mode), keyed by report id and updated_at, up to this many bytes
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "inp_report_pdfs")
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+PDF_STREAM_CHUNK_SIZE = 64 * 1024
+
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+_pdf_executor_lock = threading.Lock()
+# Renders in progress, so concurrent downloads of the same report share one render
+_pending_renders: Dict[str, "_PendingRender"] = {}
+# Recently rendered in-memory PDFs (memory mode), least recently used first
+_memory_cache: "OrderedDict[str, RenderedPdf]" = OrderedDict()
+_memory_cache_bytes = 0
+
+
+class RenderedPdf:
+    """A rendered PDF, held either in memory or in an open file descriptor.
+
+    In-memory PDFs can be shared between responses. A file-backed PDF owns its
+    descriptor: every response gets its own (see `for_response`) and must
+    `close()` it when streaming ends. Spilled temp files are unlinked once
+    opened, so their disk space is freed when the last descriptor is closed.
+    """
+
+    def __init__(self, size: int, data: Optional[bytes] = None, fd: Optional[int] = None):
+        self.size = size
+        self.data = data
+        self.fd = fd
+        self._close_lock = threading.Lock()
+
+    def for_response(self) -> "RenderedPdf":
+        """This PDF, or a copy with its own descriptor for a file-backed one"""
+        if self.data is not None:
+            return self
+        return RenderedPdf(self.size, fd=os.dup(self.fd))
+
+    def close(self) -> None:
+        """Close the descriptor of a file-backed PDF (idempotent)"""
+        with self._close_lock:
+            fd, self.fd = self.fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Yield the PDF in chunks, closing a file-backed PDF at the end"""
+        if self.data is not None:
+            view = memoryview(self.data)
+            for offset in range(0, self.size, PDF_STREAM_CHUNK_SIZE):
+                yield bytes(view[offset:offset + PDF_STREAM_CHUNK_SIZE])
+            return
+        try:
+            offset = 0
+            while offset < self.size:
+                chunk = os.pread(self.fd, PDF_STREAM_CHUNK_SIZE, offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+
+class _PendingRender:
+    """A render shared by every download of the same report version that waits on it.
+
+    A file-backed result is only an intermediate: each waiter takes its own
+    descriptor from it, and its descriptor is closed once no one is waiting.
+    """
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+    def release_if_unused(self) -> None:
+        if self.waiters or not self.future.done() or self.future.cancelled() or self.future.exception():
+            return
+        self.future.result().close()
+
+
+def _get_pdf_executor() -> ProcessPoolExecutor:
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            # "spawn" keeps the API process's threads, sockets and DB pools out of the workers
+            _pdf_executor = ProcessPoolExecutor(
+                max_workers=max(1, PDF_RENDER_PROCESSES),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_executor
+
+
+def shutdown_pdf_executor() -> None:
+    """Stop the PDF worker processes (called on application shutdown)"""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is not None:
+            _pdf_executor.shutdown(wait=False)
+            _pdf_executor = None
+
+
+def _version(updated_at: Optional[datetime]) -> int:
+    return int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+
+
+def _cache_path(report_id: int, updated_at: Optional[datetime]) -> str:
+    return os.path.join(PDF_CACHE_DIR, f"report_{report_id}_{_version(updated_at)}.pdf")
+
+
+def _evict_cached_pdfs(keep_path: str, max_bytes: int) -> None:
+    """Delete the least recently used PDFs until the cache fits in `max_bytes`"""
+    cache_dir = os.path.dirname(keep_path)
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".pdf"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep_path:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
+
+
+def _render_to_cache(report_data, cache_path: str, generated_at: Optional[datetime], max_bytes: int) -> str:
+    """Render into a unique temp file, then atomically move it into the cache (runs in a worker process)"""
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix=".pdf.tmp", dir=cache_dir)
+    os.close(fd)
+    try:
+        render_report_pdf(report_data, temp_path, generated_at)
+        os.replace(temp_path, cache_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    _evict_cached_pdfs(cache_path, max_bytes)
+    return cache_path
+
+
+def _render_to_memory(report_data, generated_at: Optional[datetime], spool_threshold: int) -> Tuple[Union[bytes, str], int]:
+    """Render into a buffer (runs in a worker process).
+
+    Returns the PDF bytes, or the path of a temp file holding them when the
+    PDF is larger than `spool_threshold`, together with its size.
+    """
+    buffer = io.BytesIO()
+    render_report_pdf(report_data, buffer, generated_at)
+    size = buffer.getbuffer().nbytes
+    if size <= spool_threshold:
+        return buffer.getvalue(), size
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as spool:
+        spool.write(buffer.getbuffer())
+    return path, size
+
+
+def _open_spilled(path: str) -> int:
+    fd = os.open(path, os.O_RDONLY)
+    os.remove(path)
+    return fd
+
+
+def _remember(key: str, pdf: RenderedPdf) -> None:
+    global _memory_cache_bytes
+    if pdf.data is None or pdf.size > PDF_MEMORY_CACHE_MAX_BYTES:
+        return
+    _memory_cache[key] = pdf
+    _memory_cache_bytes += pdf.size
+    while _memory_cache_bytes > PDF_MEMORY_CACHE_MAX_BYTES:
+        _, evicted = _memory_cache.popitem(last=False)
+        _memory_cache_bytes -= evicted.size
+
+
+async def _render(key: str, report_data, report_id: int, updated_at: Optional[datetime]) -> RenderedPdf:
+    loop = asyncio.get_running_loop()
+    if PDF_OUTPUT_MODE == "disk":
+        path = await loop.run_in_executor(
+            _get_pdf_executor(), _render_to_cache, report_data, _cache_path(report_id, updated_at), updated_at, PDF_CACHE_MAX_BYTES
+        )
+        fd = os.open(path, os.O_RDONLY)
+        return RenderedPdf(os.fstat(fd).st_size, fd=fd)
+
+    result, size = await loop.run_in_executor(
+        _get_pdf_executor(), _render_to_memory, report_data, updated_at, PDF_SPOOL_THRESHOLD_BYTES
+    )
+    if isinstance(result, bytes):
+        pdf = RenderedPdf(size, data=result)
+        _remember(key, pdf)
+        return pdf
+    return RenderedPdf(size, fd=_open_spilled(result))
+
+
+async def generate_report_pdf(report_data, report_id: int, updated_at: Optional[datetime] = None) -> RenderedPdf:
+    """Return the PDF for a report version, rendering it if it is not cached.
+
+    The caller owns the result: it must be streamed with `iter_chunks` or
+    `close()`d, which frees the descriptor of a file-backed PDF.
+    """
+    key = f"{report_id}:{_version(updated_at)}"
+    if PDF_OUTPUT_MODE == "disk":
+        cache_path = _cache_path(report_id, updated_at)
+        try:
+            fd = os.open(cache_path, os.O_RDONLY)
+        except FileNotFoundError:
+            pass
+        else:
+            try:
+                os.utime(cache_path)  # mark as recently used for eviction
+            except FileNotFoundError:
+                pass  # evicted meanwhile; the open descriptor still reads it
+            return RenderedPdf(os.fstat(fd).st_size, fd=fd)
+    elif key in _memory_cache:
+        _memory_cache.move_to_end(key)
+        return _memory_cache[key]
+
+    pending = _pending_renders.get(key)
+    if pending is None:
+        pending = _PendingRender(asyncio.ensure_future(_render(key, report_data, report_id, updated_at)))
+        _pending_renders[key] = pending
+
+        def _finished(_, pending=pending):
+            _pending_renders.pop(key, None)
+            pending.release_if_unused()
+        pending.future.add_done_callback(_finished)
+    pending.waiters += 1
+    try:
+        # shield: a client disconnecting must not cancel a render other requests are waiting on
+        pdf = await asyncio.shield(pending.future)
+        return pdf.for_response()
+    finally:
+        pending.waiters -= 1
+        pending.release_if_unused()
+
+
+def render_report_pdf(report_data, output: Union[str, BinaryIO], generated_at: Optional[datetime] = None) -> None:
+    """Build the PDF for `report_data` into a path or file-like object (synchronous, CPU-bound)"""
     # Create the PDF document
     doc = SimpleDocTemplate(
-        output_path,
+        output,
         pagesize=letter,
         rightMargin=72,
         leftMargin=72,
@@ -46,7 +303,7 @@ async def generate_report_pdf(report_data, idea_name):
     elements.append(Spacer(1, 12))
     
     # Date
-    elements.append(Paragraph(f"Generated on: {datetime.utcnow().strftime('%Y-%m-%d')}", normal_style))
+    elements.append(Paragraph(f"Generated on: {(generated_at or datetime.utcnow()).strftime('%Y-%m-%d')}", normal_style))
     elements.append(Spacer(1, 24))
     
     # Overall score
@@ -123,6 +380,4 @@ async def generate_report_pdf(report_data, idea_name):
         canvas.restoreState()
 
     # Build the PDF
-    doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
-    
-    return output_path
\ No newline at end of file
+    doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
\ No newline at end of file
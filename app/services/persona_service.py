@@ -0,0 +1,35 @@
+"""
+Loading customer personas linked to ideas.
+"""
+from typing import Dict, Iterable, List
+
+from sqlalchemy.orm import Session
+
+from app.models import CustomerPersona, IdeaPersonaLink
+
+
+class PersonaService:
+    """Resolve the personas linked to ideas in a single query"""
+
+    @staticmethod
+    def get_personas_for_ideas(db: Session, idea_ids: Iterable[int]) -> Dict[int, List[CustomerPersona]]:
+        """Map each idea id to its linked personas, in the order they were linked"""
+        idea_ids = list(set(idea_ids))
+        personas_by_idea: Dict[int, List[CustomerPersona]] = {idea_id: [] for idea_id in idea_ids}
+        if not idea_ids:
+            return personas_by_idea
+
+        rows = db.query(IdeaPersonaLink.idea_id, CustomerPersona).join(
+            CustomerPersona, CustomerPersona.id == IdeaPersonaLink.persona_id
+        ).filter(
+            IdeaPersonaLink.idea_id.in_(idea_ids)
+        ).order_by(IdeaPersonaLink.id).all()
+
+        for idea_id, persona in rows:
+            personas_by_idea[idea_id].append(persona)
+        return personas_by_idea
+
+    @staticmethod
+    def get_personas_for_idea(db: Session, idea_id: int) -> List[CustomerPersona]:
+        """Linked personas of a single idea"""
+        return PersonaService.get_personas_for_ideas(db, [idea_id])[idea_id]
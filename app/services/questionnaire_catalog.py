@@ -0,0 +1,297 @@
+"""
+In-memory catalog of the idea and customer persona questionnaires.
+
+Both questionnaires are effectively static (they only change when the seed
+scripts run), so they are loaded once per process: the idea questionnaire
+is indexed by step number, parsed from the `step_{n}_...` q_uuid convention
+used by the ideaboard routes, and the responses served by the question
+endpoints are built up front with options already parsed.
+
+The catalog is reloaded when:
+- a cheap signature query (row count, max id, max updated_at of both tables)
+  shows a change, checked at most every QUESTIONNAIRE_INDEX_CHECK_SECONDS;
+- it is older than QUESTIONNAIRE_CATALOG_TTL_SECONDS;
+- `invalidate()` bumps the local version.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.http_cache import CachedPayload
+from app.models import CustomerPersonaQuestionnaire, Questionnaire
+
+QUESTIONNAIRE_INDEX_CHECK_SECONDS = float(os.getenv("QUESTIONNAIRE_INDEX_CHECK_SECONDS", 60))
+QUESTIONNAIRE_CATALOG_TTL_SECONDS = float(os.getenv("QUESTIONNAIRE_CATALOG_TTL_SECONDS", 3600))
+
+_STEP_PATTERN = re.compile(r"^step_(\d+)_")
+
+# Step titles mapping
+STEP_TITLES = {
+    1: "Target Audience",
+    2: "Problem Identification",
+    3: "Consequence of not solving the problem",
+    4: "Articulate solution",
+    5: "Before & After",
+    6: "Key benefits & Differentiation",
+    7: "Market Opportunity",
+    8: "Competitive Advantage",
+    9: "Customer Adoption Potential",
+    10: "Success Metrics & Goals",
+    11: "Feasibility"
+}
+
+# Step descriptions mapping
+STEP_DESCRIPTIONS = {
+    1: "Knowing who you are building for is the foundation of your business. Let's identify your ideal customer.",
+    2: "The best businesses solve real problems. Let's define the problem you're solving.",
+    # Add descriptions for other steps
+}
+
+
+def step_from_q_uuid(q_uuid: Optional[str]) -> Optional[int]:
+    """Step number of a `step_{n}_...` q_uuid, or None"""
+    match = _STEP_PATTERN.match(q_uuid or "")
+    return int(match.group(1)) if match else None
+
+
+class QuestionEntry(NamedTuple):
+    """Immutable copy of a questionnaire row, safe to share between threads"""
+    id: int
+    q_uuid: str
+    step: Optional[int]
+    text: Optional[str]
+    body: Optional[str]
+    remarks: Optional[str]
+    input_type: Optional[str]
+    range: Optional[str]
+    status: Optional[int]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+def _step_question_detail(q: QuestionEntry) -> schemas.QuestionDetail:
+    """Frontend-friendly form of a step question (see `/steps/{step}`)"""
+    # Extract the question ID from the q_uuid
+    # Assuming format: step_1_question_id
+    try:
+        parts = q.q_uuid.split('_')
+        question_id = parts[-1]
+    except Exception:
+        question_id = f"q_{q.id}"
+
+    # Parse range field if it contains options
+    options = None
+    if q.range:
+        try:
+            options_data = json.loads(q.range)
+            if isinstance(options_data, list):
+                options = options_data
+            elif isinstance(options_data, dict) and "options" in options_data:
+                options = options_data["options"]
+        except Exception:
+            # If range is not valid JSON, ignore it
+            pass
+
+    question_type = "text"
+    if q.input_type:
+        if q.input_type.lower() in ["checkbox", "multiple"]:
+            question_type = "multiple_choice"
+        elif q.input_type.lower() in ["radio", "single"]:
+            question_type = "single_choice"
+
+    return schemas.QuestionDetail(
+        id=question_id,
+        question_text=q.text,
+        description=q.body if q.body else None,
+        question_type=question_type,
+        options=options
+    )
+
+
+def _customer_question_response(q: CustomerPersonaQuestionnaire) -> schemas.CustomerPersonaQuestionnaireResponse:
+    options = None
+    if q.range:
+        try:
+            options = json.loads(q.range)
+            if not isinstance(options, list):
+                print(f"Invalid range for q_uuid {q.q_uuid}: {options}")
+                options = None
+        except Exception as e:
+            print(f"Error parsing range for q_uuid {q.q_uuid}: {e}")
+            options = None
+    input_type = q.input_type
+    if input_type == "multiple_choice":
+        input_type = "checkbox-group"
+    elif input_type == "single_choice":
+        input_type = "radio-group"
+    return schemas.CustomerPersonaQuestionnaireResponse(
+        q_uuid=q.q_uuid,
+        text=q.text,
+        input_type=input_type,
+        range=options,
+        category=q.category,
+        id=q.id,
+        body=q.body,
+        remarks=q.remarks,
+        status=q.status,
+        created_at=q.created_at,
+        updated_at=q.updated_at
+    )
+
+
+class QuestionnaireIndex:
+    """A loaded snapshot of both questionnaires and the responses built from them"""
+
+    def __init__(
+        self,
+        questions: List[QuestionEntry],
+        customer_questions: List[schemas.CustomerPersonaQuestionnaireResponse],
+        signature: Tuple,
+        version: int
+    ):
+        self.signature = signature
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.questions_by_id: Dict[int, QuestionEntry] = {q.id: q for q in questions}
+        by_step: Dict[int, List[QuestionEntry]] = defaultdict(list)
+        for q in questions:
+            if q.step is not None:
+                by_step[q.step].append(q)
+        self.questions_by_step: Dict[int, List[QuestionEntry]] = dict(by_step)
+        self.question_ids_by_step: Dict[int, FrozenSet[int]] = {
+            step: frozenset(q.id for q in step_questions) for step, step_questions in by_step.items()
+        }
+
+        # Ready-to-serialize responses for the question endpoints (active questions only)
+        self.step_questions: Dict[int, schemas.QuestionnaireResponse] = {}
+        self.step_data: Dict[int, schemas.StepQuestionsResponse] = {}
+        for step in by_step:
+            active = self.questions_for_step(step, active_only=True)
+            if not active:
+                continue
+            self.step_questions[step] = schemas.QuestionnaireResponse(
+                step=step,
+                questions=[schemas.QuestionResponse(**q._asdict()) for q in active]
+            )
+            self.step_data[step] = schemas.StepQuestionsResponse(
+                step_number=step,
+                title=STEP_TITLES.get(step, f"Step {step}"),
+                description=STEP_DESCRIPTIONS.get(step),
+                questions=[_step_question_detail(q) for q in active]
+            )
+        self.customer_questions = customer_questions
+
+        # The same responses encoded once, with ETags, for conditional GETs
+        self.step_questions_payloads: Dict[int, CachedPayload] = {
+            step: CachedPayload.from_content(response) for step, response in self.step_questions.items()
+        }
+        self.step_data_payloads: Dict[int, CachedPayload] = {
+            step: CachedPayload.from_content(response) for step, response in self.step_data.items()
+        }
+        self.customer_questions_payload = CachedPayload.from_content(customer_questions)
+
+    def step_for_question(self, question_id: int) -> Optional[int]:
+        question = self.questions_by_id.get(question_id)
+        return question.step if question else None
+
+    def questions_for_step(self, step: int, active_only: bool = False) -> List[QuestionEntry]:
+        questions = self.questions_by_step.get(step, [])
+        if active_only:
+            return [q for q in questions if q.status == 1]
+        return questions
+
+
+def _signature(db: Session) -> Tuple:
+    signature = ()
+    for model in (Questionnaire, CustomerPersonaQuestionnaire):
+        signature += tuple(db.query(
+            func.count(model.id),
+            func.max(model.id),
+            func.max(model.updated_at)
+        ).one())
+    return signature
+
+
+class QuestionnaireCatalog:
+    """Process-wide holder of the current QuestionnaireIndex"""
+
+    def __init__(self, check_seconds: float, ttl_seconds: float):
+        self.check_seconds = check_seconds
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._index: Optional[QuestionnaireIndex] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, index: Optional[QuestionnaireIndex]) -> bool:
+        now = time.monotonic()
+        return (
+            index is not None
+            and index.version == self.version
+            and now - index.loaded_at < self.ttl_seconds
+            and now - self._checked_at < self.check_seconds
+        )
+
+    def get(self, db: Session) -> QuestionnaireIndex:
+        """Return the current index, reloading it if the tables changed"""
+        index = self._index
+        if self._is_fresh(index):
+            return index
+        with self._lock:
+            index = self._index
+            if self._is_fresh(index):
+                return index
+            signature = _signature(db)
+            if (
+                index is None
+                or index.version != self.version
+                or index.signature != signature
+                or time.monotonic() - index.loaded_at >= self.ttl_seconds
+            ):
+                index = self._load(db, signature, self.version)
+                self._index = index
+            self._checked_at = time.monotonic()
+            return index
+
+    def invalidate(self) -> None:
+        """Bump the version so the next `get` reloads both questionnaires"""
+        with self._lock:
+            self.version += 1
+
+    @staticmethod
+    def _load(db: Session, signature: Tuple, version: int) -> QuestionnaireIndex:
+        rows = db.query(Questionnaire).order_by(Questionnaire.id).all()
+        questions = [
+            QuestionEntry(
+                id=row.id,
+                q_uuid=row.q_uuid,
+                step=step_from_q_uuid(row.q_uuid),
+                text=row.text,
+                body=row.body,
+                remarks=row.remarks,
+                input_type=row.input_type,
+                range=row.range,
+                status=row.status,
+                created_at=row.created_at,
+                updated_at=row.updated_at
+            )
+            for row in rows
+        ]
+        customer_rows = db.query(CustomerPersonaQuestionnaire).filter(
+            CustomerPersonaQuestionnaire.status == 1
+        ).order_by(CustomerPersonaQuestionnaire.id).all()
+        customer_questions = [_customer_question_response(q) for q in customer_rows]
+        print(f"[Questionnaire Catalog] 📚 Loaded {len(questions)} idea and {len(customer_questions)} persona questions (version {version})")
+        return QuestionnaireIndex(questions, customer_questions, signature, version)
+
+
+questionnaire_catalog = QuestionnaireCatalog(QUESTIONNAIRE_INDEX_CHECK_SECONDS, QUESTIONNAIRE_CATALOG_TTL_SECONDS)
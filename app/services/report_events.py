@@ -0,0 +1,146 @@
+"""
+In-process pub/sub for report generation progress.
+
+`generate_report_background` publishes events (processing, section started /
+partial / completed / failed, overview partial / completed, completed, failed,
+superseded) for its report and the SSE endpoint (`/api/report/events/{report_id}`)
+subscribes to them.
+
+Each report keeps a short replay buffer so a client that connects (or
+reconnects with Last-Event-ID) mid-run still receives what already happened.
+Buffers are dropped REPORT_EVENTS_RETENTION_SECONDS after the final event.
+
+Events only reach subscribers in the same process. When reports run in
+`python -m app.worker`, or on another API worker, the SSE endpoint falls back
+to polling the report status in the database.
+"""
+import asyncio
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+REPORT_EVENTS_RETENTION_SECONDS = float(os.getenv("REPORT_EVENTS_RETENTION_SECONDS", 300))
+REPORT_EVENTS_BUFFER_SIZE = int(os.getenv("REPORT_EVENTS_BUFFER_SIZE", 100))
+
+# Events after which no more events are published for a report. "superseded"
+# ends a run that lost its job lease; another worker finishes the report.
+TERMINAL_EVENTS = frozenset({"completed", "failed", "superseded"})
+
+
+class ReportEvent(NamedTuple):
+    id: int
+    event: str
+    data: Dict[str, Any]
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.event in TERMINAL_EVENTS
+
+    @property
+    def is_partial(self) -> bool:
+        """Text generated so far; superseded by the next event, so never replayed"""
+        return self.event.endswith("_partial")
+
+
+class Subscription:
+    """A subscriber's queue, fed from any thread"""
+
+    def __init__(self, report_id: int, loop: asyncio.AbstractEventLoop):
+        self.report_id = report_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[ReportEvent]" = asyncio.Queue()
+
+    def deliver(self, event: ReportEvent) -> None:
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    async def get(self, timeout: float) -> Optional[ReportEvent]:
+        """The next event, or None if nothing arrived within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class _Channel:
+    def __init__(self):
+        self.events: Deque[ReportEvent] = deque(maxlen=max(1, REPORT_EVENTS_BUFFER_SIZE))
+        self.subscribers: List[Subscription] = []
+        self.finished_at: Optional[float] = None
+
+
+class ReportEventBroker:
+    """Per-report channels of progress events (thread-safe)"""
+
+    def __init__(self):
+        self._channels: Dict[int, _Channel] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, report_id: int, event: str, data: Optional[Dict[str, Any]] = None) -> ReportEvent:
+        """Record an event for a report and hand it to its subscribers"""
+        with self._lock:
+            self._drop_expired()
+            channel = self._channels.get(report_id)
+            if channel is None:
+                channel = self._channels[report_id] = _Channel()
+            elif channel.finished_at is not None:
+                # A regeneration starts from a clean buffer
+                channel.events.clear()
+                channel.finished_at = None
+            report_event = ReportEvent(next(self._ids), event, data or {})
+            if not report_event.is_partial:
+                channel.events.append(report_event)
+            if report_event.is_terminal:
+                channel.finished_at = time.monotonic()
+            subscribers = list(channel.subscribers)
+        for subscription in subscribers:
+            subscription.deliver(report_event)
+        return report_event
+
+    def subscribe(
+        self, report_id: int, last_event_id: Optional[int] = None, running: bool = False
+    ) -> Tuple[Subscription, List[ReportEvent]]:
+        """Subscribe to a report; also returns the buffered events after `last_event_id`.
+
+        `running` means the report is queued or processing, so the buffer of an
+        earlier, finished generation of it is not replayed.
+        """
+        subscription = Subscription(report_id, asyncio.get_running_loop())
+        with self._lock:
+            self._drop_expired()
+            channel = self._channels.get(report_id)
+            if channel is None:
+                channel = self._channels[report_id] = _Channel()
+            elif running and channel.finished_at is not None:
+                channel.events.clear()
+                channel.finished_at = None
+            channel.subscribers.append(subscription)
+            replay = [e for e in channel.events if last_event_id is None or e.id > last_event_id]
+        return subscription, replay
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            channel = self._channels.get(subscription.report_id)
+            if channel is None:
+                return
+            if subscription in channel.subscribers:
+                channel.subscribers.remove(subscription)
+            if not channel.subscribers and not channel.events:
+                del self._channels[subscription.report_id]
+
+    def _drop_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            report_id for report_id, channel in self._channels.items()
+            if channel.finished_at is not None
+            and now - channel.finished_at > REPORT_EVENTS_RETENTION_SECONDS
+            and not channel.subscribers
+        ]
+        for report_id in expired:
+            del self._channels[report_id]
+
+
+report_events = ReportEventBroker()
@@ -0,0 +1,138 @@
+"""
+Database-backed job queue for report generation.
+
+Jobs are rows of the existing `reports` table. A worker claims a queued
+report with `SELECT ... FOR UPDATE SKIP LOCKED`, holds a lease on it that is
+extended by heartbeats, and either completes it or re-queues it with
+exponential backoff. Reports whose lease expired (e.g. the worker died) are
+picked up again by any other worker.
+"""
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models import Report
+
+# "background" runs reports in the API process via FastAPI BackgroundTasks,
+# "worker" only enqueues them for `python -m app.worker`.
+REPORT_QUEUE_MODE = os.getenv("REPORT_QUEUE_MODE", "background").lower()
+REPORT_JOB_LEASE_SECONDS = int(os.getenv("REPORT_JOB_LEASE_SECONDS", 120))
+REPORT_JOB_HEARTBEAT_SECONDS = int(os.getenv("REPORT_JOB_HEARTBEAT_SECONDS", 30))
+REPORT_JOB_MAX_ATTEMPTS = int(os.getenv("REPORT_JOB_MAX_ATTEMPTS", 3))
+REPORT_JOB_BACKOFF_BASE_SECONDS = int(os.getenv("REPORT_JOB_BACKOFF_BASE_SECONDS", 30))
+REPORT_JOB_BACKOFF_MAX_SECONDS = int(os.getenv("REPORT_JOB_BACKOFF_MAX_SECONDS", 900))
+
+
+class PermanentJobError(Exception):
+    """A report that cannot succeed on a retry (e.g. its idea has no answers); it fails at once"""
+
+
+def _backoff_seconds(attempts: int) -> float:
+    """Exponential backoff (with jitter) before retry number `attempts + 1`"""
+    ceiling = min(REPORT_JOB_BACKOFF_MAX_SECONDS, REPORT_JOB_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class ReportQueue:
+    """Enqueue, claim, heartbeat and settle report generation jobs"""
+
+    @staticmethod
+    def enqueue(report: Report) -> None:
+        """Mark a report as a fresh queued job (caller commits)"""
+        now = datetime.utcnow()
+        report.status = "queued"
+        report.attempts = 0
+        report.next_attempt_at = now
+        report.locked_by = None
+        report.locked_until = None
+        report.heartbeat_at = None
+        report.updated_at = now
+
+    @staticmethod
+    def claim(db: Session, worker_id: str) -> Optional[Tuple[int, int, int]]:
+        """Claim the next runnable report and return (report_id, idea_id, user_id)"""
+        while True:
+            now = datetime.utcnow()
+            report = db.query(Report).filter(
+                or_(
+                    and_(
+                        Report.status == "queued",
+                        or_(Report.next_attempt_at == None, Report.next_attempt_at <= now)  # noqa: E711
+                    ),
+                    # A worker died or stalled while holding the lease
+                    and_(Report.status == "processing", Report.locked_until != None, Report.locked_until < now)  # noqa: E711
+                )
+            ).order_by(Report.next_attempt_at, Report.id).with_for_update(skip_locked=True).first()
+
+            if not report:
+                db.commit()
+                return None
+
+            if (report.attempts or 0) >= REPORT_JOB_MAX_ATTEMPTS:
+                # Lease expired on the last allowed attempt; give up on this job
+                report.status = "failed"
+                report.error_message = report.error_message or "Report generation did not finish after retries"
+                report.locked_by = None
+                report.locked_until = None
+                report.updated_at = now
+                db.commit()
+                continue
+
+            report.status = "processing"
+            report.attempts = (report.attempts or 0) + 1
+            report.locked_by = worker_id
+            report.locked_until = now + timedelta(seconds=REPORT_JOB_LEASE_SECONDS)
+            report.heartbeat_at = now
+            report.updated_at = now
+            job = (report.id, report.idea_id, report.user_id)
+            db.commit()
+            return job
+
+    @staticmethod
+    def heartbeat(db: Session, report_id: int, worker_id: str) -> bool:
+        """Extend the lease; returns False if another worker has taken the job over"""
+        now = datetime.utcnow()
+        updated = db.query(Report).filter(
+            Report.id == report_id,
+            Report.locked_by == worker_id
+        ).update({
+            Report.locked_until: now + timedelta(seconds=REPORT_JOB_LEASE_SECONDS),
+            Report.heartbeat_at: now
+        }, synchronize_session=False)
+        db.commit()
+        return updated > 0
+
+    @staticmethod
+    def settle(db: Session, report_id: int, worker_id: str, permanent: bool = False) -> str:
+        """Release the lease after a run, re-queueing failed jobs with backoff.
+
+        `permanent` means the run failed with a PermanentJobError, so it is not retried.
+        """
+        report = db.query(Report).filter(
+            Report.id == report_id,
+            Report.locked_by == worker_id
+        ).with_for_update().first()
+        if not report:
+            db.commit()
+            return "lost"
+
+        now = datetime.utcnow()
+        if report.status in ("failed", "processing"):
+            if report.status == "processing":
+                # The run ended without recording an outcome
+                report.error_message = report.error_message or "Report generation stopped unexpectedly"
+            if (report.attempts or 0) < REPORT_JOB_MAX_ATTEMPTS and not (permanent and report.status == "failed"):
+                report.status = "queued"
+                report.next_attempt_at = now + timedelta(seconds=_backoff_seconds(report.attempts or 1))
+            else:
+                report.status = "failed"
+        report.locked_by = None
+        report.locked_until = None
+        report.updated_at = now
+        status = report.status
+        db.commit()
+        return status
@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 from sqlalchemy.orm import Session
 from app.models import User
+from app.user_cache import invalidate_user
 from app.services.subscription_config import (
     SUBSCRIPTION_PLANS, 
     get_limit_for_plan, 
@@ -80,7 +81,7 @@ class SubscriptionService:
         return get_all_plans()
     
     @staticmethod
-    async def update_user_subscription_from_stripe(user: User, db: Session) -> None:
+    def update_user_subscription_from_stripe(user: User, db: Session) -> None:
         """Update user's subscription details from Stripe"""
         if not user.stripe_subscription_id:
             return
@@ -101,12 +102,13 @@ class SubscriptionService:
                 user.trial_end = datetime.fromtimestamp(subscription.trial_end)
                 
             db.commit()
+            invalidate_user(user.email)
         except Exception as e:
             # Log the error but don't throw an exception
             print(f"Error updating subscription from Stripe: {str(e)}")
     
     @staticmethod
-    async def process_subscription_change(user: User, new_price_id: str, db: Session) -> Dict[str, Any]:
+    def process_subscription_change(user: User, new_price_id: str, db: Session) -> Dict[str, Any]:
         """Process a subscription change (upgrade/downgrade)"""
         if not user.stripe_subscription_id:
             raise ValueError("No active subscription found")
@@ -137,6 +139,7 @@ class SubscriptionService:
             user.subscription_status = updated_subscription.status
             user.current_period_end = datetime.fromtimestamp(updated_subscription.current_period_end)
             db.commit()
+            invalidate_user(user.email)
             
             return {
                 "status": "success",
@@ -0,0 +1,94 @@
+# app/user_cache.py
+"""
+Short-lived cache of authenticated users, keyed by the JWT subject (email).
+
+`get_current_user` resolves identity on every authenticated request. Caching
+the user row for a few seconds keeps that lookup off MySQL for steady-state
+traffic. Entries are detached copies of the row; callers attach them to
+their own session with `Session.merge(..., load=False)`, which issues no
+query. Paths that change a user must call `invalidate_user` after committing.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models import User
+
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+# Bounds how stale a user can be in other processes, which never see local invalidations
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 1024))
+
+
+def _detached_copy(user: User) -> User:
+    """Copy the loaded column values of `user` into a new, detached User"""
+    mapper = inspect(User)
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+class UserCache:
+    """Thread-safe LRU of detached User rows with a TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, email: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._entries[email]
+                return None
+            self._entries.move_to_end(email)
+            return user
+
+    def set(self, email: str, user: User) -> None:
+        copy = _detached_copy(user)
+        with self._lock:
+            self._entries[email] = (time.monotonic() + self.ttl_seconds, copy)
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: Optional[str]) -> None:
+        if not email:
+            return
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    """Return the user for `email` attached to `db`, using the cache when possible"""
+    if USER_CACHE_ENABLED:
+        cached = user_cache.get(email)
+        if cached is not None:
+            return db.merge(cached, load=False)
+
+    user = db.query(User).filter(User.email == email).first()
+    if user is not None and USER_CACHE_ENABLED:
+        user_cache.set(email, user)
+    return user
+
+
+def invalidate_user(email: Optional[str]) -> None:
+    """Drop a user from the cache after it has been modified or deleted"""
+    user_cache.invalidate(email)
@@ -0,0 +1,108 @@
+# app/worker.py
+"""
+Standalone report worker.
+
+Run with `python -m app.worker` (see Procfile). Each process claims queued
+reports from the database and generates them, so report throughput can be
+scaled by running more worker processes without touching the API servers.
+Set REPORT_QUEUE_MODE=worker on the API so it only enqueues reports.
+"""
+import asyncio
+import os
+import signal
+import socket
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.routers.report_routes import generate_report_background
+from app.services.llm_service import LLMService
+from app.services.report_queue import ReportQueue, REPORT_JOB_HEARTBEAT_SECONDS
+
+REPORT_WORKER_CONCURRENCY = int(os.getenv("REPORT_WORKER_CONCURRENCY", 2))  # reports generated at once per process
+REPORT_WORKER_POLL_SECONDS = float(os.getenv("REPORT_WORKER_POLL_SECONDS", 2.0))
+
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def _heartbeat(report_id: int, worker_id: str):
+    while True:
+        await asyncio.sleep(REPORT_JOB_HEARTBEAT_SECONDS)
+        try:
+            still_ours = await run_in_threadpool(_with_session, ReportQueue.heartbeat, report_id, worker_id)
+            if not still_ours:
+                print(f"[Report Worker] ⚠️ Lost lease on report {report_id}")
+                return
+        except Exception as e:
+            print(f"[Report Worker] Heartbeat failed for report {report_id}: {e}")
+
+
+async def process_job(job, worker_id: str):
+    report_id, idea_id, user_id = job
+    print(f"[Report Worker] ▶️ {worker_id} generating report {report_id} (idea {idea_id})")
+    heartbeat = asyncio.create_task(_heartbeat(report_id, worker_id))
+    outcome = None
+    try:
+        outcome = await generate_report_background(report_id, idea_id, user_id, worker_id)
+    finally:
+        heartbeat.cancel()
+        try:
+            status = await run_in_threadpool(
+                _with_session, ReportQueue.settle, report_id, worker_id, outcome == "failed_permanently"
+            )
+            print(f"[Report Worker] ⏹️ Report {report_id} settled as '{status}'")
+        except Exception as e:
+            # The lease will expire and another worker will pick the job up again
+            print(f"[Report Worker] Could not settle report {report_id}: {e}")
+
+
+async def run_worker(worker_id: str, concurrency: int = REPORT_WORKER_CONCURRENCY):
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    await LLMService.startup()
+    active = set()
+    print(f"[Report Worker] 🚀 {worker_id} started (concurrency={concurrency})")
+    try:
+        while not stopping.is_set():
+            if len(active) >= concurrency:
+                await asyncio.wait(active, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            try:
+                job = await run_in_threadpool(_with_session, ReportQueue.claim, worker_id)
+            except Exception as e:
+                print(f"[Report Worker] Error claiming job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(stopping.wait(), timeout=REPORT_WORKER_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(process_job(job, worker_id))
+            active.add(task)
+            task.add_done_callback(active.discard)
+    finally:
+        # Finish in-flight reports before exiting; unfinished leases expire and are retried elsewhere
+        if active:
+            print(f"[Report Worker] Waiting for {len(active)} report(s) to finish...")
+            await asyncio.gather(*active, return_exceptions=True)
+        await LLMService.shutdown()
+        print(f"[Report Worker] 👋 {worker_id} stopped")
+
+
+if __name__ == "__main__":
+    worker_name = os.getenv("REPORT_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    asyncio.run(run_worker(worker_name))
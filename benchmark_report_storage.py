@@ -0,0 +1,148 @@
+"""
+Compare storage formats for report bodies (reports.content): stored size per
+row and read latency (SELECT + decode) for plain JSON and each compressed
+format of app/compressed_json.py.
+
+Usage:
+    python benchmark_report_storage.py                    # synthetic reports
+    python benchmark_report_storage.py --from-db          # completed reports from DATABASE_URL
+    python benchmark_report_storage.py --samples 500 --reads 20
+
+The read test loads the samples into an in-memory SQLite table per format,
+so it measures row size and decode cost rather than network or disk I/O.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+import sqlalchemy as sa
+
+from app.compressed_json import (
+    CompressedJSON, encode_json, decode_json, zstd_available,
+    CODEC_PLAIN, CODEC_ZLIB, CODEC_ZSTD, NO_DICTIONARY, REPORT_DICTIONARY_V1,
+)
+
+SECTION_TITLES = [
+    ("Target audience", 9), ("Problem Identification", 9), ("Consequence of not solving the problem", 9),
+    ("Articulate solution", 9), ("Before & After", 9), ("Key benefits & Differentiation", 9),
+    ("Market Opportunity", 9), ("Competitive Advantage", 9), ("Customer Adoption Potential", 9),
+    ("Success Metrics & Goals", 9), ("Feasibility", 10),
+]
+WORDS = (
+    "the customers market product solution problem users value pricing competitors growth strategy "
+    "should consider focus validate identify segment early adopters retention onboarding channel "
+    "revenue subscription pilot interviews survey metrics churn acquisition cost differentiation "
+    "a to of and in for with on that this is your their clear strong specific potential"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_reports(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for n in range(count):
+        yield {
+            "idea_name": f"Idea {n}",
+            "overall_score": rng.randint(20, 90),
+            "report_overview": " ".join(_sentence(rng, 18) for _ in range(6)),
+            "sections": [
+                {
+                    "category": title,
+                    "score": rng.randint(0, max_score),
+                    "max_score": max_score,
+                    "weighted_score": max_score,
+                    "insight": " ".join(_sentence(rng, 16) for _ in range(4)),
+                    "recommendations": [_sentence(rng, 12) for _ in range(3)],
+                }
+                for title, max_score in SECTION_TITLES
+            ],
+            "strategic_next_steps": [_sentence(rng, 14) for _ in range(4)],
+        }
+
+
+def database_reports(limit: int):
+    from app.database import SessionLocal
+    from app.models import Report
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Report.content).filter(Report.content.isnot(None)).limit(limit).all()
+        return [row.content for row in rows]
+    finally:
+        db.close()
+
+
+def formats():
+    """(name, codec, dictionary id) of every format available here"""
+    result = [
+        ("json (uncompressed)", CODEC_PLAIN, NO_DICTIONARY),
+        ("zlib", CODEC_ZLIB, NO_DICTIONARY),
+        ("zlib + report dictionary", CODEC_ZLIB, REPORT_DICTIONARY_V1),
+    ]
+    if zstd_available():
+        result += [
+            ("zstd", CODEC_ZSTD, NO_DICTIONARY),
+            ("zstd + report dictionary", CODEC_ZSTD, REPORT_DICTIONARY_V1),
+        ]
+    return result
+
+
+def read_latency_ms(samples, codec: bytes, dictionary_id: int, reads: int) -> float:
+    """Median time to SELECT and decode every sample once, from an in-memory table"""
+    engine = sa.create_engine("sqlite://")
+    metadata = sa.MetaData()
+    table = sa.Table(
+        "reports", metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("content", CompressedJSON(dictionary_id)),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Insert pre-encoded blobs so every row uses the format under test
+        raw = sa.table("reports", sa.column("id", sa.Integer), sa.column("content", sa.LargeBinary))
+        conn.execute(raw.insert(), [
+            {"id": n + 1, "content": encode_json(sample, dictionary_id, codec)} for n, sample in enumerate(samples)
+        ])
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(reads):
+            started = time.perf_counter()
+            for row in conn.execute(sa.select(table.c.content)):
+                assert row.content is not None
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark report body storage formats")
+    parser.add_argument("--from-db", action="store_true", help="Use completed reports from DATABASE_URL")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=10, help="Timed passes over all samples")
+    args = parser.parse_args()
+
+    samples = database_reports(args.samples) if args.from_db else list(synthetic_reports(args.samples))
+    if not samples:
+        print("No report bodies to benchmark.")
+        return 1
+    plain_size = sum(len(json.dumps(sample, ensure_ascii=False).encode("utf-8")) for sample in samples)
+    print(f"{len(samples)} report(s), {plain_size / len(samples):.0f} bytes of JSON on average")
+    if not zstd_available():
+        print("(zstandard is not installed; zstd formats skipped)")
+
+    print(f"\n{'format':<28}{'avg bytes':>10}{'ratio':>8}{'read all (ms)':>15}")
+    for name, codec, dictionary_id in formats():
+        encoded = [encode_json(sample, dictionary_id, codec) for sample in samples]
+        assert all(decode_json(blob) == sample for blob, sample in zip(encoded, samples))
+        size = sum(len(blob) for blob in encoded)
+        latency = read_latency_ms(samples, codec, dictionary_id, args.reads)
+        print(f"{name:<28}{size / len(samples):>10.0f}{plain_size / size:>8.2f}{latency:>15.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Run EXPLAIN on the application's hottest queries and fail if any of them
+has to scan a whole table.
+
+Usage:
+    python check_query_plans.py               # against DATABASE_URL (MySQL or SQLite)
+    python check_query_plans.py --create-all  # first create missing tables from the models (local SQLite)
+
+Exits with status 1 if a query table-scans.
+"""
+import sys
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.database import engine, Base
+from app.models import Answer, Report, IdeaPersonaLink, Trash, CustomerPersona
+
+# (description, statement) pairs mirroring the filters used by the routes
+KEY_QUERIES = [
+    ("answers of an idea (report generation)",
+     select(Answer).where(Answer.ideaBoard_id == 1, Answer.user_id == 1)),
+    ("answer of a question (step save upsert)",
+     select(Answer).where(Answer.question_id == 1, Answer.ideaBoard_id == 1, Answer.user_id == 1)),
+    ("completed report of an idea (get_report / download_report)",
+     select(Report).where(Report.idea_id == 1, Report.status == "completed")),
+    ("runnable report jobs (worker claim)",
+     select(Report).where(Report.status == "queued", Report.next_attempt_at <= datetime.utcnow())),
+    ("persona link of an idea (link / unlink persona)",
+     select(IdeaPersonaLink).where(IdeaPersonaLink.idea_id == 1, IdeaPersonaLink.persona_id == 1)),
+    ("personas linked to ideas (PersonaService)",
+     select(IdeaPersonaLink.idea_id, CustomerPersona)
+     .join(CustomerPersona, CustomerPersona.id == IdeaPersonaLink.persona_id)
+     .where(IdeaPersonaLink.idea_id.in_([1, 2]))),
+    ("trashed ideas of a user",
+     select(Trash).where(Trash.user_id == 1).order_by(Trash.deleted_at)),
+    ("personas of a user",
+     select(CustomerPersona).where(CustomerPersona.user_id == 1)),
+]
+
+
+def _explain(conn, statement):
+    """Return (plan rows, list of table-scan descriptions) for one statement"""
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    if engine.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+        details = [row[-1] for row in rows]
+        # "SCAN answers" is a full table scan; "SEARCH ... USING INDEX" / "SCAN ... USING INDEX" are fine
+        scans = [d for d in details if d.startswith("SCAN") and "INDEX" not in d]
+        return details, scans
+    rows = conn.exec_driver_sql(f"EXPLAIN {compiled}", params).mappings().fetchall()
+    details = [dict(row) for row in rows]
+    # type=ALL with no usable key means MySQL has to read every row
+    scans = [
+        f"{row.get('table')}: type=ALL" for row in details
+        if row.get("type") == "ALL" and not row.get("possible_keys")
+    ]
+    return details, scans
+
+
+def main() -> int:
+    if "--create-all" in sys.argv:
+        Base.metadata.create_all(bind=engine)
+
+    failures = 0
+    with engine.connect() as conn:
+        for description, statement in KEY_QUERIES:
+            plan, scans = _explain(conn, statement)
+            if scans:
+                failures += 1
+                print(f"❌ {description}: table scan ({'; '.join(scans)})")
+                for row in plan:
+                    print(f"     {row}")
+            else:
+                print(f"✅ {description}")
+
+    if failures:
+        print(f"\n{failures} of {len(KEY_QUERIES)} queries table-scan. Is the database migrated to the latest revision?")
+        return 1
+    print(f"\nAll {len(KEY_QUERIES)} queries use indexes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
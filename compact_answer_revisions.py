@@ -0,0 +1,38 @@
+"""
+Fold answer revisions older than the retention window into one revision per
+answer (the value as of the cutoff). Meant to run periodically, e.g. from cron.
+
+Usage:
+    python compact_answer_revisions.py                      # ANSWER_REVISION_RETENTION_DAYS (default 90)
+    python compact_answer_revisions.py --retention-days 30
+    python compact_answer_revisions.py --dry-run            # only count what would be deleted
+"""
+import argparse
+import sys
+
+from app.database import SessionLocal
+from app.services.answer_service import AnswerService, ANSWER_REVISION_RETENTION_DAYS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compact the answer_revisions table")
+    parser.add_argument("--retention-days", type=int, default=ANSWER_REVISION_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        deleted = AnswerService.compact_revisions(
+            db, retention_days=args.retention_days, batch_size=args.batch_size, dry_run=args.dry_run
+        )
+    finally:
+        db.close()
+
+    verb = "Would delete" if args.dry_run else "Deleted"
+    print(f"{verb} {deleted} answer revision(s) older than {args.retention_days} days.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Checks for the revoked-token Bloom filter sync (app/blacklist.py) against a
+throwaway SQLite database.
+
+Usage:
+    python test_token_revocation.py     (or: python -m pytest test_token_revocation.py)
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+_db_file = os.path.join(tempfile.mkdtemp(), "revocation.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import RevokedToken  # noqa: E402
+from app.blacklist import DatabaseRevocationBackend, hash_token  # noqa: E402
+
+Base.metadata.create_all(bind=engine, tables=[RevokedToken.__table__])
+
+
+def _insert(token_hash: str, row_id: int, revoked_at: datetime) -> None:
+    db = SessionLocal()
+    try:
+        db.add(RevokedToken(
+            id=row_id, token_hash=token_hash, revoked_at=revoked_at,
+            expires_at=datetime.utcnow() + timedelta(hours=1)
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _force_sync(backend: DatabaseRevocationBackend) -> None:
+    backend._last_sync = 0.0
+    backend._sync_bloom()
+
+
+def test_late_commit_with_lower_id_is_synced():
+    backend = DatabaseRevocationBackend(use_bloom=True)
+    early, late = hash_token("token-early"), hash_token("token-late")
+
+    # Row 20 is committed first; the sync after it has seen every higher id so far
+    _insert(late, 20, datetime.utcnow())
+    _force_sync(backend)
+    assert backend.is_revoked(late)
+
+    # Row 10 got its id (and timestamp) before row 20 but commits only now
+    _insert(early, 10, datetime.utcnow() - timedelta(seconds=2))
+    _force_sync(backend)
+    assert backend.is_revoked(early)
+
+
+def test_unrevoked_token_is_not_revoked():
+    backend = DatabaseRevocationBackend(use_bloom=True)
+    assert not backend.is_revoked(hash_token("never-revoked"))
+
+
+if __name__ == "__main__":
+    test_late_commit_with_lower_id_is_synced()
+    test_unrevoked_token_is_not_revoked()
+    print("Token revocation checks passed.")